@@ -1,17 +1,18 @@
 # SmartSpendAnalyser/backend/app/__init__.py
-from flask import Flask
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Import the database initialization function
-from .database import initialize_db
-
 def create_app():
+    # Imported here rather than at module level so that command-line tools in this package
+    # (python -m app.batch_parse) run without Flask, JWT or MongoDB.
+    from flask import Flask
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+    from .database import initialize_db
+
     app = Flask(__name__)
     app.config['TEMPLATES_AUTO_RELOAD'] = False 
 
@@ -21,6 +22,15 @@ def create_app():
 
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER_PATH
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Example: 16 MB max upload size
+    # Uploads up to this size are OCR'd from memory; larger ones are spooled to UPLOAD_FOLDER
+    app.config['UPLOAD_SPOOL_THRESHOLD'] = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", 4 * 1024 * 1024))
+    # Maximum number of images accepted by one /api/upload/batch request
+    app.config['BATCH_MAX_FILES'] = int(os.getenv("BATCH_MAX_FILES", 100))
+    # Default and largest page size of /api/transactions and of the transactions in /api/dashboard
+    app.config['TRANSACTIONS_PAGE_SIZE'] = int(os.getenv("TRANSACTIONS_PAGE_SIZE", 50))
+    app.config['TRANSACTIONS_MAX_PAGE_SIZE'] = int(os.getenv("TRANSACTIONS_MAX_PAGE_SIZE", 200))
+    # Comma-separated user IDs allowed to read the process-wide cache and re-parse stats; none by default
+    app.config['OPS_USER_IDS'] = {user_id.strip() for user_id in os.getenv("OPS_USER_IDS", "").split(",") if user_id.strip()}
 
     # Create the upload folder if it doesn't exist
     if not os.path.exists(UPLOAD_FOLDER_PATH):
@@ -0,0 +1,176 @@
+# SmartSpendAnalyser/backend/app/analytics.py
+"""
+Spending charts and summary read from the per-user spending rollups (see rollups.py).
+
+Rollup rows are kept per (user, day, category) as receipts are written, so a chart reads a
+few rows per day of its window, or per category, however long a user's history is. The
+JSON shapes are those of the Python loops that once read every receipt;
+benchmarks/compare_aggregations.py checks that they still agree.
+
+Receipts stored before the rollups existed are added by `python -m app.rollups --rebuild`.
+"""
+from datetime import datetime, time, timedelta
+
+from bson.objectid import ObjectId
+
+from . import database
+from .reparse import upgrade_user_receipts
+
+PIE_CHART_COLORS = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#E7E9ED', '#8D6E63', '#A1887F', '#C5E1A5', '#BA68C8']
+
+
+def _user_object_id(user_id):
+    """ Returns the user's ObjectId after upgrading their outdated receipts, or None if user_id is invalid. """
+    if database.rollups_collection is None or not ObjectId.is_valid(user_id):
+        return None
+    user_object_id = ObjectId(user_id)
+    upgrade_user_receipts(user_object_id) # Also brings their rollups up to date
+    return user_object_id
+
+
+def _daily_totals(user_object_id, start, end):
+    pipeline = [
+        {"$match": {
+            "user_id": user_object_id,
+            "day": {"$gte": datetime.combine(start, time.min), "$lt": datetime.combine(end, time.min)},
+            "bill_count": {"$gt": 0}
+        }},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$day"}},
+                    "total": {"$sum": "$bill_amount"}}}
+    ]
+    return {row["_id"]: row["total"] for row in database.rollups_collection.aggregate(pipeline)}
+
+
+def daily_totals(user_id, start, end):
+    """
+    Sums receipt totals per day.
+    Args:
+        user_id (str): The ID of the user.
+        start, end (date): The window, end excluded.
+    Returns:
+        dict: {'YYYY-MM-DD': total} for the days with at least one receipt.
+    """
+    user_object_id = _user_object_id(user_id)
+    if user_object_id is None:
+        return {}
+    return _daily_totals(user_object_id, start, end)
+
+
+def _category_totals(user_object_id):
+    pipeline = [
+        {"$match": {"user_id": user_object_id, "count": {"$gt": 0}}},
+        {"$group": {"_id": "$category", "total": {"$sum": "$amount"}, "order": {"$max": "$order"}}},
+        {"$sort": {"order": -1}}
+    ]
+    return [(row["_id"], row["total"]) for row in database.rollups_collection.aggregate(pipeline)]
+
+
+def category_totals(user_id):
+    """
+    Sums spending per category over all of a user's receipts: item prices by item category,
+    or the bill total by bill category for receipts without items. Non-spend and
+    non-positive amounts are left out.
+    Returns:
+        list: (category, total) pairs in the order the categories first show up going through
+        the receipts newest first (by upload time, then _id) and their items in order.
+    """
+    user_object_id = _user_object_id(user_id)
+    if user_object_id is None:
+        return []
+    return _category_totals(user_object_id)
+
+
+def _bar_window(today):
+    """ The last 7 days, today included, as a (start, end) window with end excluded. """
+    return today - timedelta(days=6), today + timedelta(days=1)
+
+
+def _summary_window(today):
+    """ Last month and this month, as a (start, end) window with end excluded. Contains _bar_window. """
+    month_start = today.replace(day=1)
+    return (month_start - timedelta(days=1)).replace(day=1), (month_start + timedelta(days=32)).replace(day=1)
+
+
+def _bar_chart(totals, today):
+    labels = [(today - timedelta(days=i)).isoformat() for i in range(6, -1, -1)]
+    return {
+        'labels': labels,
+        'datasets': [{
+            'label': 'Spending per Day (Last 7 Days)',
+            'backgroundColor': 'rgba(211, 47, 47, 0.7)',
+            'borderColor': 'rgba(211, 47, 47, 1)',
+            'borderWidth': 1,
+            'hoverBackgroundColor': 'rgba(255, 102, 89, 0.8)',
+            'hoverBorderColor': 'rgba(255, 102, 89, 1)',
+            'data': [float(totals.get(label, 0.0)) for label in labels]
+        }]
+    }
+
+
+def _pie_chart(totals):
+    labels = [category for category, _ in totals]
+    return {
+        'labels': labels,
+        'datasets': [{
+            'data': [float(total) for _, total in totals],
+            'backgroundColor': [PIE_CHART_COLORS[i % len(PIE_CHART_COLORS)] for i in range(len(labels))],
+            'hoverOffset': 4
+        }]
+    }
+
+
+def _summary(totals, today):
+    start, _ = _summary_window(today)
+    this_month, last_month = today.isoformat()[:7], start.isoformat()[:7]
+    current_month_days = [total for day, total in totals.items() if day.startswith(this_month)]
+    current_month_spending = float(sum(current_month_days))
+    last_month_spending = float(sum(total for day, total in totals.items() if day.startswith(last_month)))
+    return {
+        "currentMonthSpending": current_month_spending,
+        "lastMonthSpending": last_month_spending,
+        "averageDaily": current_month_spending / len(current_month_days) if current_month_days else 0.0,
+        "savingsRate": "N/A" # This needs actual income data to calculate
+    }
+
+
+def bar_chart_data(user_id, today=None):
+    """ Chart.js bar chart of spending per day over the last 7 days, today included. """
+    today = today or datetime.utcnow().date()
+    return _bar_chart(daily_totals(user_id, *_bar_window(today)), today)
+
+
+def pie_chart_data(user_id):
+    """ Chart.js pie chart of spending per category over all receipts. """
+    return _pie_chart(category_totals(user_id))
+
+
+def spending_summary(user_id, today=None):
+    """ This month's and last month's spending, and the average over this month's days with spending. """
+    today = today or datetime.utcnow().date()
+    return _summary(daily_totals(user_id, *_summary_window(today)), today)
+
+
+def dashboard_data(user_id, sections, today=None):
+    """
+    Several of the above at once, sharing one upgrade of the user's receipts and one read of
+    their daily rollups (the summary's window contains the bar chart's).
+    Args:
+        user_id (str): The ID of the user.
+        sections (collection of str): Any of 'summary', 'bar' and 'pie'.
+    Returns:
+        dict: {section: data} for the requested sections, data as from spending_summary,
+        bar_chart_data and pie_chart_data.
+    """
+    today = today or datetime.utcnow().date()
+    user_object_id = _user_object_id(user_id)
+    data = {}
+    if "summary" in sections or "bar" in sections:
+        window = _summary_window(today) if "summary" in sections else _bar_window(today)
+        totals = _daily_totals(user_object_id, *window) if user_object_id is not None else {}
+        if "summary" in sections:
+            data["summary"] = _summary(totals, today)
+        if "bar" in sections:
+            data["bar"] = _bar_chart(totals, today)
+    if "pie" in sections:
+        data["pie"] = _pie_chart(_category_totals(user_object_id) if user_object_id is not None else [])
+    return data
@@ -0,0 +1,273 @@
+# SmartSpendAnalyser/backend/app/backfill.py
+"""
+Re-categorizes stored receipts with the current category rules.
+
+Receipts are streamed in _id order and recategorized in batches on a process pool. Only
+the categories that changed are written back, with one bulk_write per batch; each write
+only matches if the receipt still has the versions and values that were read, so a
+concurrent re-parse or backfill is never overwritten or counted twice. Written receipts
+carry the ObjectId of their batch in backfill_batch. Progress is checkpointed in the
+BackfillCheckpoints collection after every batch, so an interrupted run picks up where it
+stopped. Receipts already stamped with the current rules_version are skipped unless
+--force is given. Receipts whose write went through are moved between the rows of their
+user's spending rollups (see rollups.py) with one more bulk_write per batch.
+
+Usage:
+    python -m app.backfill [--batch-size N] [--workers N] [--restart] [--force] [--dry-run]
+"""
+import argparse
+import copy
+import datetime
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from . import database
+from .categorizer import get_rules, recategorize_parsed_data
+from .rollups import receipt_updates, write_updates
+
+CHECKPOINT_ID = "recategorize_receipts"
+
+# Only what recategorization and the rollups read; extracted_text and the items are the bulk of a receipt.
+RECEIPT_PROJECTION = {
+    "user_id": 1,
+    "timestamp": 1,
+    "extracted_text": 1,
+    "parsed_data.date": 1,
+    "parsed_data.total_amount": 1,
+    "parsed_data.merchant": 1,
+    "parsed_data.category": 1,
+    "parsed_data.items": 1,
+    "parsed_data.parser_version": 1,
+    "parsed_data.rules_version": 1
+}
+
+
+def recategorize_batch(receipts):
+    """
+    Runs in a pool worker. Returns (receipt _id, {field: value}) pairs for the receipts
+    whose categories changed, with fields as dotted paths from the document root.
+    """
+    rules = get_rules()
+    updates = []
+    for receipt in receipts:
+        changes = recategorize_parsed_data(receipt.get("parsed_data") or {}, receipt.get("extracted_text"), rules)
+        if changes:
+            updates.append((receipt["_id"], {f"parsed_data.{field}": value for field, value in changes.items()}))
+    return updates
+
+
+def _with_fields(receipt, fields):
+    """ A copy of receipt with recategorize_batch's dotted-path fields set. """
+    receipt = copy.deepcopy(receipt)
+    for path, value in fields.items():
+        *parents, last = path.split(".")
+        target = receipt
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        if isinstance(target, list):
+            target[int(last)] = value
+        else:
+            target[last] = value
+    return receipt
+
+
+def _field(receipt, path):
+    """ The value at one of recategorize_batch's dotted paths, or None if it is missing. """
+    value = receipt
+    for part in path.split("."):
+        if isinstance(value, list):
+            value = value[int(part)] if part.isdigit() and int(part) < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+def write_changes(receipts, updates):
+    """
+    Writes recategorize_batch's changes back with one bulk_write, then updates the spending
+    rollups of the receipts that were written, from the snapshot that was read.
+    Each write only matches if the receipt still has the parser and rules versions and the
+    old values of the changed fields that were read; otherwise it changed since (a re-parse,
+    another backfill) and is left alone. A missing field matches None.
+    Args:
+        receipts (dict): The batch as read, by _id.
+        updates (list): (receipt _id, {field: value}) pairs from recategorize_batch.
+    Returns:
+        int: The number of receipts written.
+    """
+    # Stamped on every receipt this bulk_write changes, to tell them apart if not all guards match.
+    batch_id = ObjectId()
+    operations = []
+    for receipt_id, fields in updates:
+        query = {"_id": receipt_id}
+        for path in ["parsed_data.parser_version", "parsed_data.rules_version", *fields]:
+            query[path] = _field(receipts[receipt_id], path)
+        operations.append(UpdateOne(query, {"$set": {**fields, "backfill_batch": batch_id}}))
+    try:
+        matched = database.receipts_collection.bulk_write(operations, ordered=False).matched_count
+    except Exception as e:
+        print(f"Error writing {len(operations)} re-categorized receipts: {e}")
+        matched = None
+    if matched != len(operations):
+        updates = _written_updates(batch_id, updates)
+        print(f"{len(operations) - len(updates)} receipts changed since they were read or failed to write, skipping them.")
+    write_updates([update for receipt_id, fields in updates for update in
+                   receipt_updates(receipts[receipt_id], _with_fields(receipts[receipt_id], fields))])
+    return len(updates)
+
+
+def _written_updates(batch_id, updates):
+    """
+    For a bulk_write in which not every guard matched (or that failed part way), re-reads the
+    receipts stamped with its batch_id and keeps their updates. Only another backfill re-stamps
+    a receipt, and only after reading this write, so a receipt it rewrites in the moment between
+    the two is counted as not written; python -m app.rollups reports any such drift.
+    """
+    try:
+        written = {receipt["_id"] for receipt in database.receipts_collection.find(
+            {"_id": {"$in": [receipt_id for receipt_id, _ in updates]}, "backfill_batch": batch_id}, {"_id": 1})}
+    except Exception as e:
+        print(f"Error re-reading re-categorized receipts: {e}")
+        return []
+    return [(receipt_id, fields) for receipt_id, fields in updates if receipt_id in written]
+
+
+def _iter_batches(cursor, batch_size):
+    """ Groups a cursor into lists of batch_size documents. """
+    batch = []
+    for receipt in cursor:
+        batch.append(receipt)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_checkpoint(rules_version, restart=False):
+    """
+    Returns the checkpoint to resume from, starting a new one when there is none, when
+    restart is set, or when the previous run used a different rules version.
+    """
+    checkpoints = database.backfill_checkpoints_collection
+    checkpoint = None if restart else checkpoints.find_one({"_id": CHECKPOINT_ID})
+    if checkpoint is not None and checkpoint.get("rules_version") != rules_version:
+        print(f"Checkpoint is for rules version {checkpoint.get('rules_version')}, "
+              f"starting over for version {rules_version}.")
+        checkpoint = None
+    if checkpoint is None:
+        checkpoint = {
+            "_id": CHECKPOINT_ID,
+            "rules_version": rules_version,
+            "last_id": None,
+            "scanned": 0,
+            "updated": 0,
+            "started_at": datetime.datetime.utcnow(),
+            "completed_at": None
+        }
+    return checkpoint
+
+
+def save_checkpoint(checkpoint):
+    checkpoint["updated_at"] = datetime.datetime.utcnow()
+    database.backfill_checkpoints_collection.replace_one({"_id": CHECKPOINT_ID}, checkpoint, upsert=True)
+
+
+def run_backfill(batch_size=500, workers=None, restart=False, force=False, dry_run=False):
+    """
+    Re-categorizes every receipt after the checkpoint.
+    Returns:
+        dict: The final checkpoint ('scanned', 'updated', 'last_id', ...).
+    """
+    rules = get_rules()
+    checkpoint = load_checkpoint(rules.version, restart)
+    workers = workers or os.cpu_count() or 2
+
+    query = {}
+    if checkpoint["last_id"] is not None:
+        query["_id"] = {"$gt": checkpoint["last_id"]}
+        print(f"Resuming after receipt {checkpoint['last_id']} "
+              f"({checkpoint['scanned']} scanned, {checkpoint['updated']} updated so far).")
+    if not force:
+        query["parsed_data.rules_version"] = {"$ne": rules.version}
+
+    print(f"Re-categorizing receipts with rules version {rules.version} "
+          f"({workers} workers, batches of {batch_size}{', dry run' if dry_run else ''}).")
+    started = time.time()
+    scanned_at_start = checkpoint["scanned"]
+
+    cursor = database.receipts_collection.find(query, RECEIPT_PROJECTION, no_cursor_timeout=True) \
+        .sort("_id", 1).batch_size(batch_size)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep only a few batches in flight so memory stays flat however many receipts there are.
+            pending = deque()
+            batches = _iter_batches(cursor, batch_size)
+            while True:
+                while len(pending) < workers * 2:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    pending.append((batch, executor.submit(recategorize_batch, batch)))
+                if not pending:
+                    break
+
+                batch, future = pending.popleft()
+                last_id, batch_len = batch[-1]["_id"], len(batch)
+                updates = future.result()
+                if updates and not dry_run:
+                    written = write_changes({receipt["_id"]: receipt for receipt in batch}, updates)
+                else:
+                    written = len(updates)
+                checkpoint["last_id"] = last_id
+                checkpoint["scanned"] += batch_len
+                checkpoint["updated"] += written
+                if not dry_run:
+                    save_checkpoint(checkpoint)
+
+                rate = (checkpoint["scanned"] - scanned_at_start) / max(time.time() - started, 1e-9)
+                print(f"  {checkpoint['scanned']} scanned, {checkpoint['updated']} updated "
+                      f"(last _id {last_id}, {rate:,.0f} receipts/sec)")
+    finally:
+        cursor.close()
+
+    checkpoint["completed_at"] = datetime.datetime.utcnow()
+    if not dry_run:
+        save_checkpoint(checkpoint)
+    print(f"Backfill complete: {checkpoint['scanned']} scanned, {checkpoint['updated']} updated "
+          f"in {time.time() - started:.1f}s.")
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=500, help="Receipts per worker batch and bulk_write")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--restart', action='store_true', help="Ignore the saved checkpoint and start from the first receipt")
+    parser.add_argument('--force', action='store_true', help="Also re-categorize receipts already on the current rules version")
+    parser.add_argument('--dry-run', action='store_true', help="Count changes without writing receipts or the checkpoint")
+    args = parser.parse_args(argv)
+
+    database.initialize_db()
+    if database.receipts_collection is None:
+        return 1
+    try:
+        run_backfill(args.batch_size, args.workers, args.restart, args.force, args.dry_run)
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume from the last checkpoint.")
+        return 130
+    finally:
+        database.client.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
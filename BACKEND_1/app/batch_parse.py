@@ -0,0 +1,173 @@
+# SmartSpendAnalyser/backend/app/batch_parse.py
+"""
+Parses a directory of receipts offline, without Flask, JWT or MongoDB.
+
+Every .txt file is read as already-OCR'd text. Every image (.png, .jpg, .jpeg, .gif) is
+first run through extract_text_from_image. The text then goes through parse_extracted_text.
+The work is spread over a multiprocessing pool, and one JSON object per file is streamed
+as JSON Lines as the results come in. Throughput statistics go to stderr, so stdout can be
+piped. Text-only runs do not need Tesseract.
+
+Usage:
+    python -m app.batch_parse DIRECTORY [-o results.jsonl] [--workers N] [--recursive]
+                              [--include-text] [--default-date YYYY-MM-DD] [--ordered]
+
+Each output line has 'file', 'ok' and 'source' ('text' or 'image'). Successful files also
+have 'parsed_data', 'ocr_seconds' and 'parse_seconds'; failed ones have 'error'.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from .receipt_parser import parse_extracted_text
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+TEXT_EXTENSIONS = {'txt'}
+
+
+def find_inputs(directory, recursive=False):
+    """ Returns the paths of the text and image files in a directory, sorted. """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in files:
+            extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+            if not name.startswith('.') and extension in IMAGE_EXTENSIONS | TEXT_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def _init_worker():
+    """ Pool initializer: worker logging goes to stderr so it cannot interleave with JSON Lines on stdout. """
+    sys.stdout = sys.stderr
+
+
+def parse_file(task):
+    """
+    Runs in a pool worker: OCRs (images only) and parses one file.
+    Args:
+        task (tuple): (path, display name, default_date, include_text).
+    Returns:
+        dict: The JSON Lines record for the file.
+    """
+    path, name, default_date, include_text = task
+    is_image = path.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS
+    record = {"file": name, "ok": False, "source": "image" if is_image else "text"}
+    try:
+        started = time.perf_counter()
+        if is_image:
+            # Imported here so text-only runs work without pytesseract/Tesseract.
+            from .ocr_utils import extract_text_from_image
+            extracted_text = extract_text_from_image(path)
+        else:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                extracted_text = f.read()
+        ocr_done = time.perf_counter()
+        parsed_data = parse_extracted_text(extracted_text, default_date)
+        parse_done = time.perf_counter()
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+
+    if not include_text:
+        parsed_data.pop("original_text", None)
+    record.update({
+        "ok": True,
+        "parsed_data": parsed_data,
+        "ocr_seconds": round(ocr_done - started, 6) if is_image else 0.0,
+        "parse_seconds": round(parse_done - ocr_done, 6)
+    })
+    return record
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def run_batch(paths, out, directory, workers=None, default_date=None, include_text=False, ordered=False):
+    """
+    Parses files on a process pool and writes one JSON line per file to out.
+    Returns:
+        dict: Throughput statistics for the run.
+    """
+    workers = workers or os.cpu_count() or 2
+    tasks = [(path, os.path.relpath(path, directory), default_date, include_text) for path in paths]
+    # Small chunks keep the pool busy when a few images take much longer than the rest.
+    chunksize = max(1, min(32, len(tasks) // (workers * 8)))
+
+    stats = {"files": len(tasks), "ok": 0, "failed": 0, "images": 0, "items": 0}
+    ocr_times, parse_times = [], []
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        results = pool.imap(parse_file, tasks, chunksize) if ordered else \
+            pool.imap_unordered(parse_file, tasks, chunksize)
+        for record in results:
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            if record["source"] == "image":
+                stats["images"] += 1
+            if record["ok"]:
+                stats["ok"] += 1
+                stats["items"] += len(record["parsed_data"].get("items", []))
+                parse_times.append(record["parse_seconds"])
+                if record["source"] == "image":
+                    ocr_times.append(record["ocr_seconds"])
+            else:
+                stats["failed"] += 1
+    elapsed = time.perf_counter() - started
+
+    stats.update({
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_sec": round(len(tasks) / elapsed, 1) if elapsed else 0.0,
+        "items_per_sec": round(stats["items"] / elapsed, 1) if elapsed else 0.0,
+        "ocr_ms_mean": round(1000 * sum(ocr_times) / len(ocr_times), 3) if ocr_times else 0.0,
+        "parse_ms_p50": round(1000 * _percentile(parse_times, 0.50), 3),
+        "parse_ms_p99": round(1000 * _percentile(parse_times, 0.99), 3)
+    })
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help="Directory of .txt OCR dumps and/or receipt images")
+    parser.add_argument('-o', '--output', default='-', help="JSON Lines output file (default: stdout)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--recursive', action='store_true', help="Also parse files in subdirectories")
+    parser.add_argument('--include-text', action='store_true', help="Keep 'original_text' in parsed_data")
+    parser.add_argument('--default-date', default=None,
+                        help="YYYY-MM-DD date for receipts whose text has none (default: today)")
+    parser.add_argument('--ordered', action='store_true', help="Write results in file order instead of as they finish")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}", file=sys.stderr)
+        return 2
+    paths = find_inputs(args.directory, args.recursive)
+    if not paths:
+        print(f"No .txt or image files found in {args.directory}", file=sys.stderr)
+        return 1
+    print(f"Parsing {len(paths)} files from {args.directory}...", file=sys.stderr)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = run_batch(paths, out, args.directory, args.workers, args.default_date, args.include_text, args.ordered)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{stats['files']} files ({stats['images']} images) in {stats['elapsed_seconds']:.2f}s "
+          f"with {stats['workers']} workers: {stats['ok']} parsed, {stats['failed']} failed", file=sys.stderr)
+    print(f"  {stats['files_per_sec']:,.1f} files/sec, {stats['items_per_sec']:,.1f} items/sec; "
+          f"parse p50 {stats['parse_ms_p50']:.3f} ms, p99 {stats['parse_ms_p99']:.3f} ms; "
+          f"OCR mean {stats['ocr_ms_mean']:.1f} ms", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
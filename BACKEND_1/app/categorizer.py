@@ -0,0 +1,419 @@
+# SmartSpendAnalyser/backend/app/categorizer.py
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from .merchant_index import TrigramIndex
+
+# --- CONFIGURATION: Category Rules ---
+# Store mapping, bill-level keywords and item-level keyword rules live in a versioned JSON
+# file (app/rules/category_rules.json by default) so the taxonomy can change without a redeploy.
+# The file is checked for changes at most every CATEGORY_RULES_RELOAD_SECONDS; a changed file is
+# compiled in the background of the next lookup and swapped in atomically. If it fails to load,
+# the previous rules stay active. Set CATEGORY_RULES_RELOAD_SECONDS to 0 to disable reloading.
+#
+# File format:
+#   version                              - rule set version, stamped on parsed receipts as 'rules_version'
+#   store_category_map                   - cleaned merchant name -> {"overall": ..., "items_default": ...};
+#                                          items_default null means item rules apply
+#   overall_keyword_rules                - [{"category", "keywords"}] checked in order against the bill text
+#                                          when no store matches; overall_default otherwise
+#   item_rules                           - [{"category", "keywords", "conditional"}] in priority order: an item
+#                                          gets the category of the FIRST rule with a matching keyword. A keyword
+#                                          matches when it occurs anywhere in the lowercased item name. Entries in
+#                                          "conditional" are {"keyword": k, "any_of": [...]} (k occurs and at least
+#                                          one of any_of occurs) or {"keyword": k, "none_of": [...]} (k occurs and
+#                                          none of none_of occurs)
+#   non_spend_keywords                   - item names containing these are not spend items
+#   merchant_default_non_spend_keywords  - the same check for merchants whose items share a default category
+CATEGORY_RULES_PATH = os.getenv("CATEGORY_RULES_PATH", os.path.join(os.path.dirname(__file__), "rules", "category_rules.json"))
+CATEGORY_RULES_RELOAD_SECONDS = float(os.getenv("CATEGORY_RULES_RELOAD_SECONDS", 5))
+
+# --- CONFIGURATION: Fuzzy Merchant Matching ---
+# When no store name occurs exactly in the merchant name, the closest store within this
+# similarity (1 - edit distance / store name length, after folding OCR confusions like 0 -> o)
+# is used, so "STARBUKS" still maps to "starbucks". Set to 0 to disable fuzzy matching.
+MERCHANT_FUZZY_THRESHOLD = float(os.getenv("MERCHANT_FUZZY_THRESHOLD", 0.85))
+
+# --- CONFIGURATION: Item Category Cache ---
+# Item names repeat across receipts ("MILK 1L", "PETROL"), so item categories are memoized per
+# process, keyed on the lowercased item name, the merchant category and the rule set.
+# Cleared whenever the rules are reloaded. Set to 0 to disable.
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", 50000))
+
+# An item "name" that is only a price is an OCR error.
+PRICE_ONLY_PATTERN = re.compile(r'^\d+\.\d{2}$')
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords.
+    find_all() reports every keyword that occurs anywhere in a text, including
+    overlapping ones, in a single left-to-right pass over the text.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        outputs = [set()]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(keyword)
+
+        # Breadth-first pass to build failure links and merge outputs along them.
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                if state:
+                    self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                outputs[next_state] |= outputs[self._fail[next_state]]
+        self._outputs = [frozenset(output) for output in outputs]
+
+    def find_all(self, text):
+        """ Returns the set of keywords that occur in text. """
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+
+class RuleSet:
+    """
+    A compiled, immutable set of category rules. Built once per rules file version;
+    reloading replaces the whole object, so a lookup never sees half-updated rules.
+    """
+
+    def __init__(self, data):
+        self.version = str(data["version"])
+        self.store_category_map = {name: {"overall": config["overall"], "items_default": config.get("items_default")}
+                                   for name, config in data["store_category_map"].items()}
+        self.overall_keyword_rules = [(rule["category"], tuple(rule["keywords"])) for rule in data["overall_keyword_rules"]]
+        self.overall_default = data.get("overall_default", "General")
+        self.item_rules = [(rule["category"], list(rule.get("keywords", ())) + list(rule.get("conditional", ())))
+                           for rule in data["item_rules"]]
+        self.non_spend_keywords = frozenset(data["non_spend_keywords"])
+        self.merchant_default_non_spend_keywords = frozenset(data["merchant_default_non_spend_keywords"])
+        self._compile_item_rules()
+        # Store names in map order, and one automaton over all of them, so finding the first
+        # store that occurs in a merchant string costs one pass over the string.
+        self._store_names = list(self.store_category_map)
+        self._store_rank = {name: rank for rank, name in enumerate(self._store_names)}
+        self._store_automaton = KeywordAutomaton(self._store_names)
+        self._category_store_configs = {}
+        self._store_trigram_index = TrigramIndex(self._store_names)
+
+    def _compile_item_rules(self):
+        """
+        Compiles item_rules into:
+          - keyword_rule: plain keyword -> index of the first rule that lists it
+          - conditional_terms: (rule index, keyword, any_of, none_of) tuples sorted by rule index
+          - automaton: one KeywordAutomaton over every keyword the rules and exclusions use
+        """
+        self.keyword_rule = {}
+        self.conditional_terms = []
+        keywords = set(self.non_spend_keywords) | set(self.merchant_default_non_spend_keywords)
+        for index, (_, terms) in enumerate(self.item_rules):
+            for term in terms:
+                if isinstance(term, str):
+                    self.keyword_rule.setdefault(term, index)
+                    keywords.add(term)
+                else:
+                    any_of = frozenset(term.get("any_of", ())) or None
+                    none_of = frozenset(term.get("none_of", ()))
+                    self.conditional_terms.append((index, term["keyword"], any_of, none_of))
+                    keywords.add(term["keyword"])
+                    keywords.update(any_of or ())
+                    keywords.update(none_of)
+        self.conditional_terms.sort(key=lambda t: t[0])
+        self.automaton = KeywordAutomaton(sorted(keywords))
+
+    def first_matching_rule(self, found):
+        """ Returns the index of the first item rule satisfied by the set of found keywords, or None. """
+        best = min((self.keyword_rule[k] for k in found if k in self.keyword_rule), default=len(self.item_rules))
+        for index, keyword, any_of, none_of in self.conditional_terms:
+            if index >= best:
+                break
+            if keyword in found and (any_of is None or any_of & found) and not none_of & found:
+                best = index
+                break
+        return best if best < len(self.item_rules) else None
+
+    def find_store(self, merchant_lower):
+        """
+        Returns the config of the first store in store_category_map whose name occurs
+        in the cleaned merchant string, or None. Same result as scanning the map in order.
+        """
+        found = self._store_automaton.find_all(merchant_lower)
+        if not found:
+            return None
+        return self.store_category_map[min(found, key=self._store_rank.__getitem__)]
+
+    def find_store_fuzzy(self, merchant_lower, threshold):
+        """ Config of the store closest to the merchant name within threshold, or None. """
+        match = self._store_trigram_index.best_match(merchant_lower, threshold)
+        return self.store_category_map[match[0]] if match else None
+
+    def store_for_category(self, merchant_category):
+        """
+        find_store() for an overall bill category, as item categorization uses it. There are only
+        a handful of distinct categories, so the results are remembered.
+        """
+        config = self._category_store_configs.get(merchant_category, False)
+        if config is False:
+            config = self.find_store(clean_merchant_name(merchant_category))
+            self._category_store_configs[merchant_category] = config
+        return config
+
+
+def load_rules(path):
+    """
+    Reads and compiles a category rules file.
+    Raises:
+        OSError, ValueError, KeyError: If the file cannot be read or is malformed.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return RuleSet(json.load(f))
+
+
+_rules = None
+_rules_stamp = None
+_rules_checked_at = 0.0
+_rules_lock = threading.Lock()
+
+
+def _file_stamp(path):
+    """ Returns (mtime, size) of a file; a change in either triggers a reload. """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_rules():
+    """
+    Returns the active RuleSet, loading it on first use and reloading it when the
+    rules file has changed. Safe to call from any thread and from pool workers;
+    each process keeps its own compiled copy.
+    """
+    global _rules, _rules_stamp, _rules_checked_at
+    rules = _rules
+    now = time.monotonic()
+    if rules is not None and (CATEGORY_RULES_RELOAD_SECONDS <= 0 or now - _rules_checked_at < CATEGORY_RULES_RELOAD_SECONDS):
+        return rules
+
+    with _rules_lock:
+        if _rules is not None and _rules is not rules:
+            return _rules  # Another thread just reloaded.
+        _rules_checked_at = now
+        try:
+            stamp = _file_stamp(CATEGORY_RULES_PATH)
+            if _rules is not None and stamp == _rules_stamp:
+                return _rules
+            new_rules = load_rules(CATEGORY_RULES_PATH)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if _rules is None:
+                raise
+            print(f"Error reloading category rules from {CATEGORY_RULES_PATH}, keeping version {_rules.version}: {e}")
+            return _rules
+        if _rules is not None:
+            print(f"Reloaded category rules: version {_rules.version} -> {new_rules.version}")
+        _rules, _rules_stamp = new_rules, stamp
+        _cached_item_category.cache_clear()
+        return _rules
+
+
+def clean_merchant_name(merchant_name):
+    """ Cleans and normalizes merchant names for mapping. """
+    return re.sub(r'[^a-z0-9\s]', '', merchant_name.lower()).strip()
+
+def _overall_category(rules, merchant_lower, whole_text_lower):
+    """ Bill category from a cleaned merchant name and the lowercased receipt text. """
+    # Check direct merchant mapping first; names match partially, e.g. "WAL*MART" -> "walmart"
+    store_config = rules.find_store(merchant_lower)
+    # Then allow for OCR misreads, e.g. "DOMIN0S" or "STARBUKS"
+    if store_config is None and MERCHANT_FUZZY_THRESHOLD > 0:
+        store_config = rules.find_store_fuzzy(merchant_lower, MERCHANT_FUZZY_THRESHOLD)
+    if store_config is not None:
+        return store_config['overall']
+
+    # Fallback to keywords in the overall text if no direct merchant match
+    for category, keywords in rules.overall_keyword_rules:
+        if any(keyword in whole_text_lower for keyword in keywords):
+            return category
+
+    return rules.overall_default # Default if nothing specific is found
+
+def _item_category(rules, item_name_lower, merchant_category, merchant_config):
+    """ Item category given the merchant config already resolved from merchant_category. """
+    found = rules.automaton.find_all(item_name_lower)
+
+    # 1. If merchant has a specific item default, use it (e.g., McDonald's -> Food & Dining)
+    if merchant_config and merchant_config.get("items_default"):
+        # Check for specific exclusions if the default is very broad (e.g., "Non-Spend Item")
+        if found & rules.merchant_default_non_spend_keywords:
+            return "Non-Spend Item"
+        return merchant_config["items_default"]
+
+    # 2. If no specific merchant default, apply general item-level rules
+    # This part gets executed for stores like Big Bazaar, Amazon where items need individual classification.
+
+    # Rule 0: Exclusions for OCR artifacts or non-spend items
+    if found & rules.non_spend_keywords:
+        return "Non-Spend Item"
+    if PRICE_ONLY_PATTERN.search(item_name_lower): # If item name is just a price (OCR error)
+        return "Non-Spend Item"
+
+    # Item rules: first matching rule group wins
+    rule_index = rules.first_matching_rule(found)
+    if rule_index is not None:
+        return rules.item_rules[rule_index][0]
+
+    # Default category if no specific rule matches for items
+    return merchant_category # Fallback to the overall merchant category if no specific item rule applies
+
+
+@functools.lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _cached_item_category(rules, item_name_lower, merchant_category):
+    """ Memoized _item_category. The RuleSet is part of the key, so entries never outlive their rules. """
+    return _item_category(rules, item_name_lower, merchant_category, rules.store_for_category(merchant_category))
+
+
+def get_categorization_cache_stats():
+    """ Returns hit/miss counters and the current size of the item category cache (reset on rules reload). """
+    info = _cached_item_category.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0
+    }
+
+
+class CategorizationContext:
+    """
+    Everything about a receipt that item categorization depends on, resolved once:
+    the rule set, the lowercased receipt text, the overall bill category and the
+    store config that category maps to. categorize_item() then only looks at the item name.
+    """
+
+    def __init__(self, merchant_name, whole_text, rules=None):
+        self.rules = rules or get_rules()
+        self.whole_text_lower = whole_text.lower()
+        self.overall_category = _overall_category(self.rules, clean_merchant_name(merchant_name), self.whole_text_lower)
+        # Items are matched against the overall category, e.g. "Health & Fitness" -> the "fitness" store entry
+        self.merchant_config = self.rules.store_for_category(self.overall_category)
+
+    @classmethod
+    def for_category(cls, merchant_category, rules=None):
+        """ Builds a context for items of a bill whose overall category is already known. """
+        context = cls.__new__(cls)
+        context.rules = rules or get_rules()
+        context.whole_text_lower = ""
+        context.overall_category = merchant_category
+        context.merchant_config = context.rules.store_for_category(merchant_category)
+        return context
+
+    def categorize_item(self, item_name):
+        """ Categorizes a single item of this receipt. """
+        return _cached_item_category(self.rules, item_name.lower(), self.overall_category)
+
+
+def categorize_overall_bill(merchant_name, whole_text, rules=None):
+    """
+    Determines the primary category of the entire bill based on merchant name and context.
+    Pass rules to categorize against a specific RuleSet instead of the active one.
+    """
+    rules = rules or get_rules()
+    return _overall_category(rules, clean_merchant_name(merchant_name), whole_text.lower())
+
+def categorize_item(item_name, merchant_category, whole_text, rules=None):
+    """
+    Categorizes a single item, considering the overall merchant category.
+    All keyword rules are checked in a single pass over the item name.
+    When categorizing every item of a receipt, use CategorizationContext instead.
+    """
+    rules = rules or get_rules()
+    return _cached_item_category(rules, item_name.lower(), merchant_category)
+
+# Items parse_extracted_text adds for the part of the total no item line accounts for.
+# They always carry the overall bill category.
+BILL_LEVEL_ITEM_NAMES = ("Uncategorized Remainder", "Misc. Purchase")
+
+def bill_level_items(items, total, overall_category):
+    """
+    The items to append to a receipt's item lines for the part of the total they do not
+    account for: the difference if it exceeds 0.5, or the whole total if there are no items.
+    Args:
+        items (list): The receipt's spend items, without any bill-level item.
+        total (float): The receipt's total amount.
+        overall_category (str): The bill category, given to the added item.
+    Returns:
+        list: Zero or one item dicts.
+    """
+    current_items_sum = sum(item['price'] for item in items)
+    if total > 0 and abs(total - current_items_sum) > 0.5: # If discrepancy is more than 0.5 unit
+        remaining_amount = total - current_items_sum
+        if remaining_amount > 0.01: # Only add if there's a significant positive remainder
+            return [{"name": "Uncategorized Remainder", "price": remaining_amount, "category": overall_category}]
+    elif not items and total > 0: # If no items at all, and a total exists, add a generic item
+        return [{"name": "Misc. Purchase", "price": total, "category": overall_category}]
+    return []
+
+def recategorize_parsed_data(parsed_data, whole_text, rules=None):
+    """
+    Re-runs categorization on an already parsed receipt, e.g. after the rules changed.
+    Args:
+        parsed_data (dict): The stored parse result ('merchant', 'category', 'items', ...).
+        whole_text (str): The receipt's extracted text.
+        rules (RuleSet, optional): Rules to apply instead of the active ones.
+    Returns:
+        dict: Only the fields that change, as dotted paths relative to parsed_data
+        (e.g. {'category': ..., 'items.2.category': ..., 'rules_version': ...}). When an item
+        becomes a "Non-Spend Item", it is dropped and the bill-level item recomputed, as
+        parse_extracted_text does, and the whole new list is returned under 'items'.
+        Items a parse dropped as non-spend under older rules are not stored, so they cannot
+        come back here even if they are spend items now; only a re-parse restores them.
+    """
+    rules = rules or get_rules()
+    context = CategorizationContext(parsed_data.get("merchant") or "Unknown Merchant", whole_text or "", rules)
+    changes = {}
+    if parsed_data.get("category") != context.overall_category:
+        changes["category"] = context.overall_category
+    items = parsed_data.get("items") or []
+    categories = [context.overall_category if (item.get("name") or "") in BILL_LEVEL_ITEM_NAMES
+                  else context.categorize_item(item.get("name") or "") for item in items]
+    if "Non-Spend Item" in categories:
+        spend_items = [{**item, "category": category} for item, category in zip(items, categories)
+                       if item.get("name") not in BILL_LEVEL_ITEM_NAMES and category != "Non-Spend Item"]
+        changes["items"] = spend_items + bill_level_items(
+            spend_items, parsed_data.get("total_amount") or 0, context.overall_category)
+    else:
+        for index, (item, category) in enumerate(zip(items, categories)):
+            if item.get("category") != category:
+                changes[f"items.{index}.category"] = category
+    if parsed_data.get("rules_version") != rules.version:
+        changes["rules_version"] = rules.version
+    return changes
@@ -1,5 +1,5 @@
 # SmartSpendAnalyser/backend/app/database.py
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
 import os
 from dotenv import load_dotenv
 
@@ -12,13 +12,72 @@ client = None
 db = None
 receipts_collection = None
 users_collection = None
+ocr_cache_collection = None
+backfill_checkpoints_collection = None
+rollups_collection = None
+jobs_collection = None
+
+# Lifetime of cached OCR results; enforced by a TTL index on OcrCache.created_at
+ocr_cache_ttl_seconds = int(os.getenv("OCR_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+
+def ensure_indexes(database):
+    """
+    Creates the indexes behind the hot query shapes. create_index is a no-op for an index that
+    already exists, so this is safe to run on every start.
+    Args:
+        database: The pymongo Database to index.
+    Returns:
+        list: The names of the indexes that could not be created (e.g. because existing
+        documents violate a unique constraint).
+    """
+    index_specs = [
+        # get_user_receipts and the keyset-paginated /api/transactions: filter on user_id, newest
+        # first with _id as the tie-break; the index also serves both sorts
+        ("Receipts", [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+         {"name": "user_id_timestamp_id"}),
+        # A user's receipts in a date window: range scans on the transaction date
+        ("Receipts", [("user_id", ASCENDING), ("txn_date", ASCENDING)], {"name": "user_id_txn_date"}),
+        # reparse.upgrade_user_receipts: a user's receipts from another parser or rules version
+        ("Receipts", [("user_id", ASCENDING), ("parsed_data.parser_version", ASCENDING),
+                      ("parsed_data.rules_version", ASCENDING)], {"name": "user_id_parse_versions"}),
+        # One row per (user, day, category); unique so concurrent $inc upserts cannot create twins.
+        # Also serves the per-user reads in analytics, with or without a day range
+        ("SpendingRollups", [("user_id", ASCENDING), ("day", ASCENDING), ("category", ASCENDING)],
+         {"name": "user_id_day_category", "unique": True}),
+        # register / login / find_user_by_username; uniqueness is enforced by the index
+        ("Users", [("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+        # Only users that have an email, since create_user allows users without one
+        ("Users", [("email", ASCENDING)], {"name": "email_unique", "unique": True,
+                                           "partialFilterExpression": {"email": {"$type": "string"}}}),
+        # Removes OCR job records once expire_at has passed (jobs.OCR_JOB_RETENTION_SECONDS after they finish)
+        ("OcrJobs", [("expire_at", ASCENDING)], {"name": "expire_at_ttl", "expireAfterSeconds": 0}),
+        # Expires cached OCR results
+        ("OcrCache", [("created_at", ASCENDING)], {"expireAfterSeconds": ocr_cache_ttl_seconds}),
+    ]
+    # Superseded indexes; (user_id, timestamp) is a prefix of user_id_timestamp_id
+    for collection_name, name in [("Receipts", "user_id_timestamp")]:
+        try:
+            if name in database[collection_name].index_information():
+                database[collection_name].drop_index(name)
+        except Exception as e:
+            print(f"Could not drop superseded index {name} on {collection_name}: {e}")
+
+    failed = []
+    for collection_name, keys, options in index_specs:
+        try:
+            database[collection_name].create_index(keys, **options)
+        except Exception as e:
+            name = options.get("name", collection_name)
+            print(f"Could not create index {name} on {collection_name}: {e}")
+            failed.append(name)
+    return failed
 
 def initialize_db():
     """
     Initializes the MongoDB connection and sets up global client and collection objects.
     This function should be called once when the Flask app starts.
     """
-    global client, db, receipts_collection, users_collection
+    global client, db, receipts_collection, users_collection, ocr_cache_collection, backfill_checkpoints_collection, rollups_collection, jobs_collection
     try:
         client = MongoClient(mongo_uri)
         # The 'ping' command is good for verifying connection
@@ -27,6 +86,11 @@ def initialize_db():
         db = client[db_name]
         receipts_collection = db["Receipts"]
         users_collection = db["Users"]
+        ocr_cache_collection = db["OcrCache"]
+        backfill_checkpoints_collection = db["BackfillCheckpoints"]
+        rollups_collection = db["SpendingRollups"]
+        jobs_collection = db["OcrJobs"]
+        ensure_indexes(db)
     except Exception as e:
         print(f"Could not connect to MongoDB: {e}")
         # In a real app, you might want more robust error handling,
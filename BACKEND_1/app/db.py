@@ -1,16 +1,22 @@
 # SmartSpendAnalyser/backend/app/db.py
 import datetime
+import re
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 import uuid 
 
 # Import the actual database objects from the database connection module
 # This breaks the circular dependency with __init__.py
-from .database import client, db, receipts_collection, users_collection
+from .database import client, receipts_collection, users_collection
+from .reparse import upgrade_receipts, REPARSE_FIELDS
+from .receipt_parser import transaction_date
+from .rollups import receipt_updates, write_updates
 
 
 def insert_receipt_to_db(user_id, image_path, extracted_text, parsed_data=None):
     """
-    Inserts a new receipt document into the 'Receipts' collection.
+    Inserts a new receipt document into the 'Receipts' collection and adds it to the
+    user's spending rollups.
     Args:
         user_id (str): The ID of the user associated with the receipt.
         image_path (str): The file path where the receipt image is stored.
@@ -35,16 +41,58 @@ def insert_receipt_to_db(user_id, image_path, extracted_text, parsed_data=None):
         "image_path": image_path,
         "extracted_text": extracted_text,
         "parsed_data": parsed_data if parsed_data is not None else {}, 
+        "txn_date": transaction_date(parsed_data), # parsed_data['date'] as an indexed BSON date
         "timestamp": datetime.datetime.utcnow()
     }
     try:
         result = receipts_collection.insert_one(receipt_doc)
         print(f"Receipt inserted with ID: {result.inserted_id}")
+        write_updates(receipt_updates(None, receipt_doc))
         return str(result.inserted_id)
     except Exception as e:
         print(f"Error inserting receipt: {e}")
         return None
 
+def insert_receipts_to_db(user_id, receipts):
+    """
+    Inserts several receipt documents into the 'Receipts' collection with a single insert_many,
+    and adds them to the user's spending rollups.
+    Args:
+        user_id (str): The ID of the user associated with the receipts.
+        receipts (list): Dicts with 'image_path', 'extracted_text' and 'parsed_data' keys.
+    Returns:
+        list: The IDs of the inserted receipt documents, in input order, or None on failure.
+    """
+    if client is None or receipts_collection is None:
+        print("Cannot insert receipts: MongoDB client or receipts_collection is not initialized.")
+        return None
+    if not receipts:
+        return []
+
+    try:
+        user_object_id = ObjectId(user_id)
+    except Exception as e:
+        print(f"Invalid user_id '{user_id}' provided for receipt insertion: {e}")
+        return None
+
+    now = datetime.datetime.utcnow()
+    receipt_docs = [{
+        "user_id": user_object_id,
+        "image_path": receipt.get("image_path"),
+        "extracted_text": receipt["extracted_text"],
+        "parsed_data": receipt.get("parsed_data") or {},
+        "txn_date": transaction_date(receipt.get("parsed_data")),
+        "timestamp": now
+    } for receipt in receipts]
+    try:
+        result = receipts_collection.insert_many(receipt_docs)
+        print(f"Inserted {len(result.inserted_ids)} receipts for user {user_id}")
+        write_updates([update for receipt_doc in receipt_docs for update in receipt_updates(None, receipt_doc)])
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+    except Exception as e:
+        print(f"Error inserting receipts: {e}")
+        return None
+
 def find_user_by_username(username):
     """
     Finds a user by their username in the 'Users' collection.
@@ -77,18 +125,27 @@ def find_user_by_id(user_id):
         return None
 
 
+def duplicate_key_field(error):
+    """
+    Returns the field ('username' or 'email') of the Users unique index that rejected an insert.
+    Args:
+        error (DuplicateKeyError): The error raised by the insert.
+    """
+    key_pattern = (error.details or {}).get("keyPattern")
+    if key_pattern:
+        return next(iter(key_pattern))
+    # Servers that do not report keyPattern still name the index in the message
+    return "email" if "email_unique" in str(error) else "username"
+
 def create_user(username, hashed_password, email=None):
     """
     Creates a new user in the 'Users' collection.
+    Returns None if the username or email is already taken (enforced by unique indexes).
     """
     if client is None or users_collection is None:
         print("Cannot create user: MongoDB client or users_collection is not initialized.")
         return None
     try:
-        if find_user_by_username(username):
-            print(f"User with username '{username}' already exists.")
-            return None
-
         user_doc = {
             "username": username,
             "password": hashed_password,
@@ -98,13 +155,36 @@ def create_user(username, hashed_password, email=None):
         result = users_collection.insert_one(user_doc)
         print(f"User '{username}' created with ID: {result.inserted_id}")
         return str(result.inserted_id)
+    except DuplicateKeyError as e:
+        print(f"User with this {duplicate_key_field(e)} already exists: '{username}'.")
+        return None
     except Exception as e:
         print(f"Error creating user '{username}': {e}")
         return None
 
-def get_user_receipts(user_id):
+def _receipt_projection(fields):
+    """
+    Builds an inclusion projection for fields plus what lazy re-parsing needs, leaving out
+    any field already covered by a projected parent (MongoDB rejects path collisions).
+    """
+    projection = dict.fromkeys(fields, 1)
+    for field in REPARSE_FIELDS:
+        parts = field.split(".")
+        if not any(".".join(parts[:i]) in projection for i in range(1, len(parts) + 1)):
+            projection[field] = 1
+    return projection
+
+def get_user_receipts(user_id, fields=None):
     """
     Fetches all receipts associated with a specific user ID from the 'Receipts' collection.
+    Receipts parsed by an older parser or with older category rules are re-parsed from their
+    stored text before they are returned (see reparse.py).
+    Args:
+        user_id (str): The ID of the user.
+        fields (iterable of str, optional): Dotted paths of the fields to fetch, e.g.
+            ('parsed_data.total_amount', 'parsed_data.date'). '_id' is always included.
+            Defaults to whole documents, including the OCR text stored in 'extracted_text'
+            and again in 'parsed_data.original_text'.
     """
     if client is None or receipts_collection is None:
         print("Cannot fetch receipts: MongoDB client or receipts_collection is not initialized.")
@@ -114,19 +194,84 @@ def get_user_receipts(user_id):
             print(f"Invalid ObjectId string for user_id in get_user_receipts: {user_id}")
             return []
           
-        receipts = list(receipts_collection.find({"user_id": ObjectId(user_id)}).sort("timestamp", -1))
-        for receipt in receipts:
-            # Convert ObjectId to string for consistent JSON serialization
-            receipt['_id'] = str(receipt['_id']) 
-            if 'user_id' in receipt: 
-                receipt['user_id'] = str(receipt['user_id'])
-            if 'timestamp' in receipt and isinstance(receipt['timestamp'], datetime.datetime):
-                receipt['timestamp'] = receipt['timestamp'].isoformat() # Convert to ISO format string
-        return receipts
+        projection = _receipt_projection(fields) if fields is not None else None
+        receipts = list(receipts_collection.find({"user_id": ObjectId(user_id)}, projection).sort("timestamp", -1))
+        return _prepare_receipts(receipts)
     except Exception as e:
         print(f"Error fetching receipts for user {user_id}: {e}")
         return []
 
+def _prepare_receipts(receipts, keep_timestamp=False):
+    """ Upgrades outdated receipts and makes the documents JSON friendly. """
+    upgrade_receipts(receipts)
+    for receipt in receipts:
+        # Convert ObjectId to string for consistent JSON serialization
+        receipt['_id'] = str(receipt['_id'])
+        if 'user_id' in receipt:
+            receipt['user_id'] = str(receipt['user_id'])
+        if not keep_timestamp and 'timestamp' in receipt and isinstance(receipt['timestamp'], datetime.datetime):
+            receipt['timestamp'] = receipt['timestamp'].isoformat() # Convert to ISO format string
+    return receipts
+
+def get_user_receipts_page(user_id, limit, after=None, fields=None, category=None, merchant=None,
+                           date_from=None, date_to=None):
+    """
+    Fetches one page of a user's receipts, newest first, ordered by (timestamp, _id) so that
+    pages stay stable while receipts are added. Filters are part of the MongoDB query.
+    Filtering uses the stored parsed_data, so a receipt that is re-parsed on this read may
+    have been matched on its previous categories.
+    Args:
+        user_id (str): The ID of the user.
+        limit (int): Maximum number of receipts to return.
+        after (tuple, optional): (timestamp, ObjectId) of the last receipt of the previous page.
+        fields (iterable of str, optional): Fields to fetch, as in get_user_receipts.
+        category (str, optional): Overall bill category, matched exactly.
+        merchant (str, optional): Case-insensitive substring of the merchant name.
+        date_from, date_to (str, optional): Inclusive YYYY-MM-DD bounds on the receipt date,
+            matched against txn_date (receipts stored before it existed need app.migrate_txn_date).
+    Returns:
+        tuple: (receipts, has_more). receipts as from get_user_receipts, except that
+        'timestamp' is left as a datetime so the caller can build the next cursor.
+    """
+    if client is None or receipts_collection is None:
+        print("Cannot fetch receipts: MongoDB client or receipts_collection is not initialized.")
+        return [], False
+    if not ObjectId.is_valid(user_id):
+        print(f"Invalid ObjectId string for user_id in get_user_receipts_page: {user_id}")
+        return [], False
+
+    query = {"user_id": ObjectId(user_id)}
+    if category:
+        query["parsed_data.category"] = category
+    if merchant:
+        query["parsed_data.merchant"] = {"$regex": re.escape(merchant), "$options": "i"}
+    if date_from or date_to:
+        # On txn_date, the receipt date as a BSON date at midnight, so the (user_id, txn_date)
+        # index applies; an inclusive date_to is every time before the next day.
+        query["txn_date"] = {}
+        if date_from:
+            query["txn_date"]["$gte"] = datetime.datetime.strptime(date_from, '%Y-%m-%d')
+        if date_to:
+            query["txn_date"]["$lt"] = datetime.datetime.strptime(date_to, '%Y-%m-%d') + datetime.timedelta(days=1)
+    if after is not None:
+        after_timestamp, after_id = after
+        query["$or"] = [
+            {"timestamp": {"$lt": after_timestamp}},
+            {"timestamp": after_timestamp, "_id": {"$lt": after_id}}
+        ]
+
+    try:
+        projection = _receipt_projection(fields) if fields is not None else None
+        # One extra receipt tells whether there is a next page
+        receipts = list(receipts_collection.find(query, projection)
+                        .sort([("timestamp", -1), ("_id", -1)]).limit(limit + 1))
+    except Exception as e:
+        print(f"Error fetching receipts page for user {user_id}: {e}")
+        return [], False
+
+    has_more = len(receipts) > limit
+    return _prepare_receipts(receipts[:limit], keep_timestamp=True), has_more
+
 # Example usage (for testing this file independently)
 if __name__ == "__main__":
     print("\n--- Testing db.py functions ---")
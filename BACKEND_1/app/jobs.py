@@ -0,0 +1,424 @@
+# SmartSpendAnalyser/backend/app/jobs.py
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+from . import database
+from .db import insert_receipt_to_db
+from .ocr_utils import extract_text_from_image
+from .ocr_cache import store_result
+from .receipt_parser import parse_extracted_text
+
+# --- CONFIGURATION: OCR Worker Pool ---
+# Number of OCR worker processes. Tesseract is CPU bound, so one per core is a good default.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 2))
+# Maximum number of jobs and batch images that may be queued or running at once. Uploads beyond this are rejected.
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", 32))
+# How long finished jobs stay available on /api/jobs/<id> before they are forgotten.
+OCR_JOB_RETENTION_SECONDS = int(os.getenv("OCR_JOB_RETENTION_SECONDS", 3600))
+# How often an event stream polls MongoDB for a job that another server process is running.
+OCR_JOB_POLL_SECONDS = float(os.getenv("OCR_JOB_POLL_SECONDS", 0.5))
+
+# Processing stages reported on /api/jobs/<id>/events, in order. A job ends with
+# 'stored' on success or 'failed' otherwise.
+JOB_STAGES = ("received", "started", "preprocessed", "ocr_done", "parsed", "stored")
+
+_executor = None
+_executor_lock = threading.Lock()
+_queue_slots = threading.BoundedSemaphore(OCR_QUEUE_SIZE)
+# Carries (job_id, stage, timestamp) from the pool workers back to this process.
+_progress_queue = None
+# Carries (job_id, future) of finished jobs from the pool's done callbacks to the finisher thread.
+_finished_queue = queue.Queue()
+
+# Jobs submitted to this process, with their futures. Every change is also written to the
+# OcrJobs collection (_persist_job), so that with several server processes a poll or event
+# stream that lands on another process than the upload still finds the job.
+_jobs = {}
+_jobs_lock = threading.Lock()
+# Notified whenever a job records a new event or finishes.
+_job_events = threading.Condition()
+
+# Set inside pool workers by _init_worker.
+_worker_progress_queue = None
+
+
+class QueueFullError(Exception):
+    """ Raised when the OCR job queue has no free slots. """
+
+
+# Error given in process_receipt_batch results for images that found the queue full.
+QUEUE_FULL_MESSAGE = "Server is busy processing receipts. Please try again shortly."
+
+
+def _init_worker(progress_queue):
+    """ Pool initializer: gives each worker the queue used to report stage progress. """
+    global _worker_progress_queue
+    _worker_progress_queue = progress_queue
+
+
+def _drain_progress():
+    """ Background thread that records stage events sent by the pool workers. """
+    while True:
+        job_id, stage, timestamp = _progress_queue.get()
+        _record_event(job_id, stage, timestamp)
+
+
+def _drain_finished():
+    """
+    Background thread that stores the results of finished jobs. Done callbacks run on the pool's
+    own management thread, so they only hand the future over; a slow or unreachable MongoDB then
+    holds up this thread rather than result collection for every job in the pool.
+    """
+    while True:
+        job_id, future = _finished_queue.get()
+        try:
+            _finish_job(job_id, future)
+        except Exception as e:
+            print(f"Error finishing OCR job {job_id}: {e}")
+
+
+def get_executor():
+    """
+    Returns the shared OCR process pool, creating it on first use.
+    The pool is created lazily so that importing this module never forks.
+    """
+    global _executor, _progress_queue
+    with _executor_lock:
+        if _executor is None:
+            _progress_queue = multiprocessing.Queue()
+            _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=_init_worker,
+                                            initargs=(_progress_queue,))
+            threading.Thread(target=_drain_progress, name="ocr-progress", daemon=True).start()
+            threading.Thread(target=_drain_finished, name="ocr-finisher", daemon=True).start()
+            print(f"Started OCR worker pool with {OCR_WORKERS} processes (queue size {OCR_QUEUE_SIZE}).")
+        return _executor
+
+
+def process_receipt_image(image_source, job_id=None):
+    """
+    Runs OCR and parsing for a single receipt image. Executed inside a pool worker.
+    Args:
+        image_source (str | bytes): The raw image bytes, or the path of an image spooled to disk.
+        job_id (str, optional): When given, stage progress is streamed back to the parent process.
+    Returns:
+        tuple: (extracted_text, parsed_data, stage_times) where stage_times is a list of
+        (stage, timestamp) pairs for the stages completed in the worker.
+    """
+    stage_times = []
+
+    def report(stage):
+        timestamp = time.time()
+        stage_times.append((stage, timestamp))
+        if job_id is not None and _worker_progress_queue is not None:
+            _worker_progress_queue.put((job_id, stage, timestamp))
+
+    report("started")
+    extracted_text = extract_text_from_image(image_source, on_stage=report)
+    parsed_data = parse_extracted_text(extracted_text)
+    report("parsed")
+    return extracted_text, parsed_data, stage_times
+
+
+def _record_event(job_id, stage, timestamp=None):
+    """
+    Appends a stage event to a job and wakes up any event stream waiting on it.
+    Workers report each stage twice (live, and again with the final result), so
+    stages the job already has are ignored, as are events for finished jobs.
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        return
+    timestamp = timestamp or time.time()
+    with _job_events:
+        if job["finished_at"] is not None or any(event["stage"] == stage for event in job["events"]):
+            return
+        previous = job["events"][-1]["timestamp"] if job["events"] else job["created_at"]
+        job["events"].append({
+            "stage": stage,
+            "timestamp": timestamp,
+            "elapsed_ms": round((timestamp - job["created_at"]) * 1000, 1),
+            "stage_ms": round((timestamp - previous) * 1000, 1)
+        })
+        _job_events.notify_all()
+    _persist_job(job)
+
+
+def _persist_job(job):
+    """
+    Writes the job's current view to the OcrJobs collection. Writes can come from the progress
+    and completion threads in either order, so each carries a version (events recorded, plus
+    one once finished) and an older state never replaces a newer one.
+    """
+    if database.jobs_collection is None:
+        return
+    version = len(job["events"]) + (1 if job["finished_at"] is not None else 0)
+    expire_at = datetime.utcfromtimestamp((job["finished_at"] or job["created_at"]) + OCR_JOB_RETENTION_SECONDS)
+    try:
+        database.jobs_collection.update_one(
+            {"_id": job["job_id"], "version": {"$lt": version}},
+            {"$set": {"user_id": job["user_id"], "version": version, "view": _job_view(job), "expire_at": expire_at}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass # A newer version is already stored
+    except Exception as e:
+        print(f"Error storing OCR job {job['job_id']}: {e}")
+
+
+def _stored_job(job_id):
+    """ Returns the OcrJobs document of a job, or None. """
+    if database.jobs_collection is None:
+        return None
+    try:
+        return database.jobs_collection.find_one({"_id": job_id}, {"user_id": 1, "view": 1})
+    except Exception as e:
+        print(f"Error reading OCR job {job_id}: {e}")
+        return None
+
+
+def _prune_finished_jobs():
+    """ Drops finished jobs that are older than OCR_JOB_RETENTION_SECONDS. """
+    cutoff = time.time() - OCR_JOB_RETENTION_SECONDS
+    with _jobs_lock:
+        expired = [job_id for job_id, job in _jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del _jobs[job_id]
+
+
+def _finish_job(job_id, future):
+    """
+    Runs on the finisher thread for each finished pool future. Stores the OCR result in MongoDB
+    from the parent process and records the final job state; whatever goes wrong, the job ends
+    up finished, as 'failed' unless its receipt was stored.
+    """
+    job = _jobs.get(job_id)
+    final_stage = "failed"
+    try:
+        extracted_text, parsed_data, stage_times = future.result()
+        # Fill in, in order, any worker stages the progress thread has not delivered yet.
+        for stage, timestamp in stage_times:
+            _record_event(job_id, stage, timestamp)
+
+        if job["image_hash"]:
+            store_result(job["image_hash"], extracted_text)
+        receipt_id = insert_receipt_to_db(job["user_id"], job["image_path"], extracted_text, parsed_data)
+        if receipt_id:
+            job["result"] = {
+                "receipt_id": receipt_id,
+                "extracted_text": extracted_text,
+                "parsed_data": parsed_data
+            }
+            job["status"] = "done"
+            final_stage = "stored"
+        else:
+            job["error"] = "Failed to save receipt data to database."
+            job["status"] = "failed"
+    except Exception as e:
+        print(f"OCR job {job_id} failed: {e}")
+        job["error"] = f"Processing failed: {str(e)}"
+        job["status"] = "failed"
+    finally:
+        try:
+            if job["image_path"] and os.path.exists(job["image_path"]):
+                os.remove(job["image_path"])
+            _record_event(job_id, final_stage)
+        except Exception as e:
+            print(f"Error cleaning up OCR job {job_id}: {e}")
+        with _job_events:
+            job["finished_at"] = time.time()
+            _job_events.notify_all()
+        _persist_job(job)
+        _queue_slots.release()
+        timings = ", ".join(f"{event['stage']}={event['stage_ms']}ms" for event in job["events"])
+        print(f"OCR job {job_id} {job['status']}: {timings}")
+
+
+def submit_receipt_job(user_id, image_source, image_path=None, image_hash=None):
+    """
+    Queues a receipt image for OCR on the worker pool.
+    Args:
+        user_id (str): The ID of the user uploading the receipt.
+        image_source (str | bytes): The raw image bytes, or the path of an image spooled to disk.
+        image_path (str, optional): The spooled file backing image_source, if any.
+            It is recorded on the receipt and removed once the job finishes.
+        image_hash (str, optional): Content hash of the image. When given, the
+            result is stored in the OCR cache under this hash.
+    Returns:
+        str: The ID of the new job.
+    Raises:
+        QueueFullError: If OCR_QUEUE_SIZE jobs are already queued or running.
+    """
+    _prune_finished_jobs()
+    if not _queue_slots.acquire(blocking=False):
+        raise QueueFullError(f"OCR queue is full ({OCR_QUEUE_SIZE} jobs pending).")
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "user_id": user_id,
+        "image_path": image_path,
+        "image_hash": image_hash,
+        "status": "queued",
+        "created_at": time.time(),
+        "finished_at": None,
+        "events": [],
+        "result": None,
+        "error": None,
+        "future": None
+    }
+    with _jobs_lock:
+        _jobs[job_id] = job
+    _record_event(job_id, "received", job["created_at"])
+
+    try:
+        future = get_executor().submit(process_receipt_image, image_source, job_id)
+    except Exception:
+        with _jobs_lock:
+            del _jobs[job_id]
+        _queue_slots.release()
+        raise
+    job["future"] = future
+    future.add_done_callback(lambda f: _finished_queue.put((job_id, f)))
+    return job_id
+
+
+def _public_event(event):
+    """ Strips the internal timestamp from a stage event. """
+    return {"stage": event["stage"], "elapsed_ms": event["elapsed_ms"], "stage_ms": event["stage_ms"]}
+
+
+def _job_view(job):
+    """ Returns the JSON-serializable view of a job record. """
+    status = job["status"]
+    if status == "queued" and (len(job["events"]) > 1 or (job["future"] is not None and job["future"].running())):
+        status = "running"
+
+    return {
+        "job_id": job["job_id"],
+        "status": status,
+        "created_at": datetime.utcfromtimestamp(job["created_at"]).isoformat(),
+        "finished_at": datetime.utcfromtimestamp(job["finished_at"]).isoformat() if job["finished_at"] else None,
+        "stages": [_public_event(event) for event in job["events"]],
+        "result": job["result"],
+        "error": job["error"]
+    }
+
+
+def get_job(job_id, user_id):
+    """
+    Returns a JSON-serializable view of a job, or None if it does not exist
+    or belongs to a different user. Jobs of other server processes are read from MongoDB.
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        stored = _stored_job(job_id)
+        return stored["view"] if stored is not None and stored["user_id"] == user_id else None
+    if job["user_id"] != user_id:
+        return None
+    return _job_view(job)
+
+
+def iter_job_events(job_id, user_id, keepalive_seconds=15):
+    """
+    Yields ('stage', event) pairs as a job progresses, then a final ('result', job view) pair.
+    While nothing happens, yields (None, None) every keepalive_seconds so callers can keep
+    the connection alive. The caller must check ownership with get_job first.
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        yield from _iter_stored_job_events(job_id, user_id, keepalive_seconds)
+        return
+    if job["user_id"] != user_id:
+        return
+
+    sent = 0
+    while True:
+        with _job_events:
+            if len(job["events"]) == sent and job["finished_at"] is None:
+                _job_events.wait(timeout=keepalive_seconds)
+            new_events = job["events"][sent:]
+            finished = job["finished_at"] is not None
+
+        if not new_events and not finished:
+            yield None, None
+        for event in new_events:
+            yield "stage", _public_event(event)
+        sent += len(new_events)
+
+        if finished:
+            yield "result", _job_view(job)
+            return
+
+
+def _iter_stored_job_events(job_id, user_id, keepalive_seconds):
+    """ iter_job_events for a job of another server process, polling its OcrJobs document. """
+    sent = 0
+    last_yield = time.time()
+    while True:
+        stored = _stored_job(job_id)
+        if stored is None or stored["user_id"] != user_id:
+            return
+        view = stored["view"]
+        new_events = view["stages"][sent:]
+        for event in new_events:
+            yield "stage", event
+        sent += len(new_events)
+
+        if view["finished_at"] is not None:
+            yield "result", view
+            return
+        if new_events:
+            last_yield = time.time()
+        elif time.time() - last_yield >= keepalive_seconds:
+            yield None, None
+            last_yield = time.time()
+        time.sleep(OCR_JOB_POLL_SECONDS)
+
+
+def process_receipt_batch(images):
+    """
+    Runs OCR and parsing for many receipt images in parallel on the worker pool,
+    blocking until all of them have finished. Each image takes a slot of the job queue
+    while it is queued or running. While images of the batch are on the pool, the next one
+    waits for a slot, which they free as they finish; when other uploads hold the whole
+    queue, the images left are not processed.
+    Args:
+        images (dict): Maps a key (e.g. the file name) to raw image bytes.
+    Returns:
+        dict: Maps each key to (extracted_text, parsed_data, None) on success
+        or (None, None, error message) on failure, QUEUE_FULL_MESSAGE if the queue was full.
+    """
+    executor = get_executor()
+    futures = {}
+    results = {}
+    for key, image_bytes in images.items():
+        if not _queue_slots.acquire(blocking=any(not future.done() for future in futures)):
+            results[key] = (None, None, QUEUE_FULL_MESSAGE)
+            continue
+        try:
+            future = executor.submit(process_receipt_image, image_bytes)
+        except Exception as e:
+            _queue_slots.release()
+            print(f"Batch OCR could not be queued for {key}: {e}")
+            results[key] = (None, None, f"Processing failed: {str(e)}")
+            continue
+        future.add_done_callback(lambda f: _queue_slots.release())
+        futures[future] = key
+    for future in as_completed(futures):
+        key = futures[future]
+        try:
+            extracted_text, parsed_data, _ = future.result()
+            results[key] = (extracted_text, parsed_data, None)
+        except Exception as e:
+            print(f"Batch OCR failed for {key}: {e}")
+            results[key] = (None, None, f"Processing failed: {str(e)}")
+    return results
@@ -0,0 +1,114 @@
+# SmartSpendAnalyser/backend/app/merchant_index.py
+import re
+from collections import defaultdict
+
+# Characters Tesseract commonly confuses on receipt headers. Both the known merchant names and
+# the OCR'd text are folded with this table before comparison, so "DOMIN0S" looks like "dominos".
+OCR_CONFUSIONS = str.maketrans({
+    "0": "o",
+    "1": "l",
+    "|": "l",
+    "5": "s",
+    "8": "b",
+    "6": "g",
+})
+_OCR_MULTI_CHAR_CONFUSIONS = [("rn", "m"), ("vv", "w")]
+
+
+def fold_ocr_text(text):
+    """ Lowercases text, folds common OCR confusions and collapses whitespace. """
+    folded = text.lower().translate(OCR_CONFUSIONS)
+    for wrong, right in _OCR_MULTI_CHAR_CONFUSIONS:
+        folded = folded.replace(wrong, right)
+    return re.sub(r'\s+', ' ', folded).strip()
+
+
+def substring_distance(pattern, text):
+    """
+    Edit distance between pattern and its best matching substring of text
+    (Sellers' algorithm: like Levenshtein, but skipping text on either side is free).
+    """
+    previous = [0] * (len(text) + 1)
+    for i, p_char in enumerate(pattern, 1):
+        current = [i] + [0] * len(text)
+        for j, t_char in enumerate(text, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (p_char != t_char))
+        previous = current
+    return min(previous)
+
+
+def trigrams(text):
+    """ Returns the set of character trigrams of already folded text, padded at both ends. """
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to known merchant names.
+
+    best_match() finds the known name that appears, possibly misspelt by OCR, anywhere in a
+    longer merchant line ("starbuks coffee #12" -> "starbucks"). Candidates come from the
+    index: only names sharing enough trigrams with the query are looked at, so lookups stay
+    fast as the list grows into the thousands. Each candidate is then scored by edit distance
+    against its best matching part of the query.
+    """
+
+    def __init__(self, names, min_length=5):
+        """
+        Args:
+            names (iterable): Known merchant names, in priority order (earlier wins ties).
+            min_length (int): Names shorter than this are not indexed; they have too few
+                trigrams for a fuzzy score to mean anything.
+        """
+        self.names = []
+        self._folded_names = []
+        self._name_trigram_counts = []
+        self._postings = defaultdict(list)
+        for name in names:
+            folded = fold_ocr_text(name)
+            if len(folded) < min_length:
+                continue
+            name_id = len(self.names)
+            self.names.append(name)
+            self._folded_names.append(folded)
+            grams = trigrams(folded)
+            self._name_trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(name_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def best_match(self, query, threshold, min_shared=0.5):
+        """
+        Returns (name, similarity) for the indexed name that best matches the query, or None
+        if no name reaches threshold. Similarity is 1 - edit distance / name length, taken
+        against the best matching part of the query. Ties go to the longer name, then the
+        earlier one.
+        Args:
+            query (str): The OCR'd merchant line.
+            threshold (float): Minimum similarity, between 0 and 1.
+            min_shared (float): Share of a name's trigrams the query must contain for the
+                name to be considered at all.
+        """
+        folded_query = fold_ocr_text(query)
+        shared = defaultdict(int)
+        for gram in trigrams(folded_query):
+            for name_id in self._postings.get(gram, ()):
+                shared[name_id] += 1
+
+        best_key = None
+        for name_id, count in shared.items():
+            if count / self._name_trigram_counts[name_id] < min_shared:
+                continue
+            name = self._folded_names[name_id]
+            similarity = 1 - substring_distance(name, folded_query) / len(name)
+            if similarity < threshold:
+                continue
+            key = (similarity, len(name), -name_id)
+            if best_key is None or key > best_key:
+                best_key = key
+        if best_key is None:
+            return None
+        return self.names[-best_key[2]], best_key[0]
@@ -0,0 +1,80 @@
+# SmartSpendAnalyser/backend/app/migrate_txn_date.py
+"""
+One-shot migration that adds txn_date to receipts stored before it existed.
+
+txn_date is parsed_data['date'] as a BSON date (midnight UTC), covered by the
+(user_id, txn_date) index that the date-window analytics scan. New receipts get it on
+insert and on re-parse; this fills it in for the rest. Receipts without a valid date get
+txn_date null, so they are not picked up again.
+
+Only receipts without the field are read, so the migration can be interrupted and re-run
+at any time, and a second run finds nothing to do.
+
+Usage:
+    python -m app.migrate_txn_date [--batch-size N] [--dry-run]
+"""
+import argparse
+import sys
+import time
+
+from pymongo import UpdateOne
+
+from . import database
+from .receipt_parser import transaction_date
+
+
+def migrate(batch_size=1000, dry_run=False):
+    """
+    Sets txn_date on every receipt that lacks it.
+    Returns:
+        dict: Counts of receipts 'scanned', 'dated' and 'undated' (no valid date).
+    """
+    counts = {"scanned": 0, "dated": 0, "undated": 0}
+    started = time.time()
+    cursor = database.receipts_collection.find(
+        {"txn_date": {"$exists": False}}, {"parsed_data.date": 1}, no_cursor_timeout=True
+    ).batch_size(batch_size)
+    updates = []
+    try:
+        for receipt in cursor:
+            txn_date = transaction_date(receipt.get("parsed_data"))
+            counts["scanned"] += 1
+            counts["dated" if txn_date is not None else "undated"] += 1
+            updates.append(UpdateOne({"_id": receipt["_id"], "txn_date": {"$exists": False}}, {"$set": {"txn_date": txn_date}}))
+            if len(updates) == batch_size:
+                if not dry_run:
+                    database.receipts_collection.bulk_write(updates, ordered=False)
+                updates = []
+                print(f"  {counts['scanned']} receipts migrated "
+                      f"({counts['scanned'] / max(time.time() - started, 1e-9):,.0f} receipts/sec)")
+        if updates and not dry_run:
+            database.receipts_collection.bulk_write(updates, ordered=False)
+    finally:
+        cursor.close()
+
+    print(f"Migration {'dry run ' if dry_run else ''}complete: {counts['scanned']} receipts, "
+          f"{counts['dated']} dated, {counts['undated']} without a valid date, in {time.time() - started:.1f}s.")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=1000, help="Receipts per bulk_write")
+    parser.add_argument('--dry-run', action='store_true', help="Count receipts without writing")
+    args = parser.parse_args(argv)
+
+    database.initialize_db() # Also creates the (user_id, txn_date) index
+    if database.receipts_collection is None:
+        return 1
+    try:
+        migrate(args.batch_size, args.dry_run)
+    except KeyboardInterrupt:
+        print("Interrupted; run again to migrate the remaining receipts.")
+        return 130
+    finally:
+        database.client.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# SmartSpendAnalyser/backend/app/ocr_cache.py
+import datetime
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .database import client, ocr_cache_collection, ocr_cache_ttl_seconds
+from .receipt_parser import parse_extracted_text
+
+# --- CONFIGURATION: OCR Result Cache ---
+# Entries in the in-process LRU. Set to 0 to disable the in-process layer and only use MongoDB.
+OCR_CACHE_MEMORY_SIZE = int(os.getenv("OCR_CACHE_MEMORY_SIZE", 256))
+# Lifetime of a cached OCR result, in seconds (OCR_CACHE_TTL_SECONDS). MongoDB enforces it
+# with a TTL index on 'created_at'; the in-process layer checks it on every lookup.
+OCR_CACHE_TTL_SECONDS = ocr_cache_ttl_seconds
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def compute_image_hash(image_source):
+    """
+    Returns the SHA-256 hex digest of an image's bytes.
+    Args:
+        image_source (str | bytes): The raw image bytes, or the path of an image on disk.
+    """
+    if isinstance(image_source, (bytes, bytearray)):
+        return hashlib.sha256(image_source).hexdigest()
+
+    digest = hashlib.sha256()
+    with open(image_source, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _remember(image_hash, entry):
+    """ Puts an entry in the in-process LRU, evicting the least recently used one if full. """
+    if OCR_CACHE_MEMORY_SIZE <= 0:
+        return
+    with _memory_lock:
+        _memory_cache[image_hash] = entry
+        _memory_cache.move_to_end(image_hash)
+        while len(_memory_cache) > OCR_CACHE_MEMORY_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _current_result(extracted_text):
+    """
+    A cache hit, parsed now. Only the OCR text is cached: parsing is cheap next to Tesseract, and
+    a parse depends on the current parser, category rules and, for text without a date, the day
+    of the upload, none of which a cached parse could keep up with.
+    """
+    return {"extracted_text": extracted_text, "parsed_data": parse_extracted_text(extracted_text)}
+
+
+def get_cached_result(image_hash):
+    """
+    Looks up a previous OCR result for an image hash. The OCR text is reused and parsed as a
+    fresh upload's would be.
+    Returns:
+        dict: {'extracted_text': str, 'parsed_data': dict} on a hit, None on a miss.
+    """
+    with _memory_lock:
+        entry = _memory_cache.get(image_hash)
+        if entry is not None:
+            if time.time() - entry["cached_at"] < OCR_CACHE_TTL_SECONDS:
+                _memory_cache.move_to_end(image_hash)
+                _stats["memory_hits"] += 1
+                return _current_result(entry["extracted_text"])
+            del _memory_cache[image_hash]
+
+    if client is not None and ocr_cache_collection is not None:
+        try:
+            doc = ocr_cache_collection.find_one({"_id": image_hash})
+        except Exception as e:
+            print(f"Error reading OCR cache entry {image_hash}: {e}")
+            doc = None
+        # The TTL monitor only runs once a minute, so double check the age here.
+        if doc is not None and doc["created_at"] > datetime.datetime.utcnow() - datetime.timedelta(seconds=OCR_CACHE_TTL_SECONDS):
+            _remember(image_hash, {
+                "extracted_text": doc["extracted_text"],
+                "cached_at": (doc["created_at"] - datetime.datetime(1970, 1, 1)).total_seconds()
+            })
+            with _memory_lock:
+                _stats["db_hits"] += 1
+            return _current_result(doc["extracted_text"])
+
+    with _memory_lock:
+        _stats["misses"] += 1
+    return None
+
+
+def store_result(image_hash, extracted_text):
+    """
+    Saves the OCR text of an image so later uploads of the same image can skip Tesseract.
+    """
+    _remember(image_hash, {"extracted_text": extracted_text, "cached_at": time.time()})
+
+    if client is None or ocr_cache_collection is None:
+        return
+    try:
+        ocr_cache_collection.replace_one(
+            {"_id": image_hash},
+            {
+                "extracted_text": extracted_text,
+                "created_at": datetime.datetime.utcnow()
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"Error storing OCR cache entry {image_hash}: {e}")
+
+
+def get_cache_stats():
+    """ Returns hit/miss counters and the current size of the in-process layer. """
+    with _memory_lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory_cache)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["memory_hits"] + stats["db_hits"]) / lookups if lookups else 0.0
+    return stats
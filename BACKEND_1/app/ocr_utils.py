@@ -1,7 +1,19 @@
 # SmartSpendAnalyser/backend/app/ocr_utils.py
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+import atexit
+import io
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# tesserocr wraps the Tesseract C++ API, so a worker can keep one engine loaded across receipts
+# instead of pytesseract forking a tesseract process (and reloading traineddata) per image.
+# It is optional; install it with `pip install tesserocr` where prebuilt wheels or libtesseract exist.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 # --- IMPORTANT: Tesseract Path Configuration ---
 # If Tesseract is not in your system's PATH, uncomment and modify the line below
@@ -32,11 +44,313 @@ else:
         print("Pytesseract will rely on system PATH. Please ensure Tesseract is installed and in PATH.")
     # --- END OF ADDITION/CHANGE ---
 
-def extract_text_from_image(image_path):
+# --- CONFIGURATION: OCR Engine ---
+# 'auto' uses a resident tesserocr engine when available and falls back to pytesseract,
+# 'tesserocr' or 'pytesseract' force one backend.
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto").lower()
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+
+if OCR_ENGINE == "tesserocr" and tesserocr is None:
+    print("OCR_ENGINE is set to 'tesserocr' but tesserocr is not installed. Falling back to pytesseract.")
+
+_engine_local = threading.local()
+_engines = []
+_engines_lock = threading.Lock()
+_tesserocr_failed = False
+
+def _get_resident_engine():
+    """
+    Returns this thread's long-lived tesserocr engine, creating it on first use.
+    Engines are tied to the process that created them, so a forked worker builds its own.
+    """
+    engine = getattr(_engine_local, "engine", None)
+    if engine is not None and _engine_local.pid == os.getpid():
+        return engine
+
+    kwargs = {"lang": OCR_LANG}
+    tessdata_prefix = os.getenv("TESSDATA_PREFIX")
+    if tessdata_prefix:
+        kwargs["path"] = tessdata_prefix
+    engine = tesserocr.PyTessBaseAPI(**kwargs)
+    _engine_local.engine = engine
+    _engine_local.pid = os.getpid()
+    with _engines_lock:
+        _engines.append(engine)
+    print(f"Loaded resident Tesseract engine (lang={OCR_LANG}) in process {os.getpid()}.")
+    return engine
+
+@atexit.register
+def _shutdown_engines():
+    """ Releases the resident engines created by this process. """
+    with _engines_lock:
+        for engine in _engines:
+            try:
+                engine.End()
+            except Exception:
+                pass
+        _engines.clear()
+
+def get_ocr_backend():
+    """ Returns the name of the OCR backend extract_text_from_image will use: 'tesserocr' or 'pytesseract'. """
+    if OCR_ENGINE == "pytesseract" or tesserocr is None or _tesserocr_failed:
+        return "pytesseract"
+    return "tesserocr"
+
+def run_ocr(img):
+    """
+    Runs Tesseract on an already loaded (and preprocessed) PIL image.
+    Uses the resident tesserocr engine when possible, otherwise pytesseract.
+    """
+    global _tesserocr_failed
+    if get_ocr_backend() == "tesserocr":
+        try:
+            engine = _get_resident_engine()
+        except Exception as e:
+            if OCR_ENGINE == "tesserocr":
+                raise
+            print(f"Could not start resident Tesseract engine, falling back to pytesseract: {e}")
+            _tesserocr_failed = True
+        else:
+            engine.SetImage(img)
+            return engine.GetUTF8Text()
+
+    return pytesseract.image_to_string(img, lang=OCR_LANG)
+
+# --- CONFIGURATION: Image Preprocessing ---
+# Stages that may run before Tesseract; they always run in this order. None is enabled by
+# default, so uploads are OCR'd exactly as received and parsed output does not change. Measure
+# the stages on your own receipts with benchmarks/bench_preprocess.py, then opt in to those
+# that help with a comma-separated list, e.g. OCR_PREPROCESS=downscale,grayscale.
+PREPROCESS_STAGE_ORDER = ("downscale", "grayscale", "threshold", "deskew")
+OCR_PREPROCESS_STAGES = tuple(
+    stage.strip() for stage in os.getenv("OCR_PREPROCESS", "").split(",")
+    if stage.strip()
+)
+# Resolution cap for the downscale stage. Tesseract works best at around 300 DPI.
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", 300))
+# Physical width assumed for images without DPI metadata (most phone photos); 4 inches covers
+# an 80 mm thermal receipt plus some margin.
+OCR_ASSUMED_WIDTH_INCHES = float(os.getenv("OCR_ASSUMED_WIDTH_INCHES", 4))
+# Window radius (pixels) and offset used by the adaptive threshold stage.
+OCR_THRESHOLD_RADIUS = int(os.getenv("OCR_THRESHOLD_RADIUS", 15))
+OCR_THRESHOLD_OFFSET = int(os.getenv("OCR_THRESHOLD_OFFSET", 10))
+# The deskew stage searches rotations in [-OCR_DESKEW_MAX_ANGLE, OCR_DESKEW_MAX_ANGLE] degrees.
+OCR_DESKEW_MAX_ANGLE = float(os.getenv("OCR_DESKEW_MAX_ANGLE", 5))
+OCR_DESKEW_STEP = float(os.getenv("OCR_DESKEW_STEP", 0.5))
+
+def downscale_image(img, target_dpi=None):
+    """
+    Shrinks an image so that it is no larger than target_dpi. Uses the DPI stored in the
+    image when it looks like a scan, otherwise assumes the image spans OCR_ASSUMED_WIDTH_INCHES.
+    Never upscales.
+    """
+    target_dpi = target_dpi or OCR_TARGET_DPI
+    dpi = img.info.get("dpi")
+    # Cameras usually write a meaningless 72/96 DPI, so only trust scanner-like values.
+    if dpi and dpi[0] >= 150:
+        scale = target_dpi / float(dpi[0])
+    else:
+        scale = (target_dpi * OCR_ASSUMED_WIDTH_INCHES) / img.width
+    if scale >= 1:
+        return img
+    new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(new_size, Image.LANCZOS)
+
+def adaptive_threshold(img, radius=None, offset=None):
+    """
+    Binarizes a grayscale image against its local mean, which copes with the uneven
+    lighting and shadows of phone photos far better than a single global threshold.
+    A pixel becomes black when it is more than `offset` darker than the mean of the
+    surrounding (2 * radius + 1) square window.
+    """
+    radius = radius or OCR_THRESHOLD_RADIUS
+    offset = OCR_THRESHOLD_OFFSET if offset is None else offset
+    local_mean = img.filter(ImageFilter.BoxBlur(radius))
+    darkness = ImageChops.subtract(local_mean, img)
+    return darkness.point(lambda v: 0 if v > offset else 255)
+
+def _row_profile_score(img):
+    """ Variance of the row darkness profile; text lines aligned to rows give sharp peaks. """
+    rows = list(img.resize((1, img.height), Image.BOX).getdata())
+    mean = sum(rows) / len(rows)
+    return sum((value - mean) ** 2 for value in rows) / len(rows)
+
+def estimate_skew_angle(img, max_angle=None, step=None):
+    """
+    Estimates the rotation (in degrees) that best aligns text lines with the horizontal,
+    by maximizing the variance of the horizontal projection profile.
+    Args:
+        img (PIL.Image.Image): A grayscale or binarized image, dark text on light background.
+    """
+    max_angle = OCR_DESKEW_MAX_ANGLE if max_angle is None else max_angle
+    step = step or OCR_DESKEW_STEP
+
+    # Score on a small inverted copy: text becomes bright and the rotated corners stay black.
+    sample = ImageOps.invert(img.convert("L"))
+    sample.thumbnail((400, 400))
+
+    best_angle, best_score = 0.0, _row_profile_score(sample)
+    steps = int(max_angle / step)
+    for i in range(-steps, steps + 1):
+        angle = i * step
+        if angle == 0:
+            continue
+        score = _row_profile_score(sample.rotate(angle, resample=Image.BILINEAR))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+def deskew_image(img):
+    """ Rotates an image so its text lines are horizontal. """
+    angle = estimate_skew_angle(img)
+    if angle == 0:
+        return img
+    return img.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+def preprocess_image(img, stages=None):
+    """
+    Prepares a receipt image for Tesseract.
+    Args:
+        img (PIL.Image.Image): The image to process.
+        stages (iterable of str, optional): Stages to apply, from PREPROCESS_STAGE_ORDER.
+            Defaults to OCR_PREPROCESS_STAGES. They always run in PREPROCESS_STAGE_ORDER.
+    Returns:
+        PIL.Image.Image: The processed image.
+    """
+    stages = OCR_PREPROCESS_STAGES if stages is None else tuple(stages)
+    unknown = set(stages) - set(PREPROCESS_STAGE_ORDER)
+    if unknown:
+        raise ValueError(f"Unknown preprocessing stage(s): {', '.join(sorted(unknown))}")
+
+    if "downscale" in stages:
+        img = downscale_image(img)
+    # Thresholding and deskewing work on luminance, so they imply a grayscale conversion.
+    if "grayscale" in stages or "threshold" in stages or "deskew" in stages:
+        img = img.convert("L")
+    if "threshold" in stages:
+        img = adaptive_threshold(img)
+    if "deskew" in stages:
+        img = deskew_image(img)
+    return img
+
+# --- CONFIGURATION: Region-based OCR ---
+# Split tall receipts into up to this many horizontal strips and OCR them concurrently.
+# 0 or 1 OCRs the whole image in one call.
+OCR_REGION_STRIPS = int(os.getenv("OCR_REGION_STRIPS", 0))
+# Blank rows needed between two text bands before the image may be cut there.
+OCR_REGION_MIN_GAP = int(os.getenv("OCR_REGION_MIN_GAP", 4))
+# A row counts as blank when less than this fraction of its pixels is ink.
+OCR_REGION_INK_RATIO = float(os.getenv("OCR_REGION_INK_RATIO", 0.002))
+
+# Threads that OCR the strips. They live as long as the process so each keeps its resident
+# tesserocr engine (see _get_resident_engine) across receipts; created per process, since a
+# forked OCR worker does not inherit the parent's threads.
+_strip_executor = None
+_strip_executor_pid = None
+_strip_executor_lock = threading.Lock()
+
+def _get_strip_executor():
+    """ Returns this process's strip OCR thread pool, creating it on first use. """
+    global _strip_executor, _strip_executor_pid
+    with _strip_executor_lock:
+        if _strip_executor is None or _strip_executor_pid != os.getpid():
+            _strip_executor = ThreadPoolExecutor(max_workers=max(OCR_REGION_STRIPS, 2), thread_name_prefix="ocr-strip")
+            _strip_executor_pid = os.getpid()
+        return _strip_executor
+
+def _is_binarized(img):
+    """ True for grayscale images that only contain black and white pixels. """
+    colors = img.getcolors(2) if img.mode == "L" else None
+    return colors is not None and all(value in (0, 255) for _, value in colors)
+
+def find_text_bands(img):
+    """
+    Finds horizontal bands of text using the row projection profile.
+    Args:
+        img (PIL.Image.Image): The (preferably preprocessed) receipt image.
+    Returns:
+        list: (top, bottom) row ranges, bottom exclusive, separated by at least
+        OCR_REGION_MIN_GAP blank rows.
+    """
+    binary = img if _is_binarized(img) else adaptive_threshold(img.convert("L"))
+    profile = binary.resize((1, binary.height), Image.BOX).getdata()
+    blank_level = 255 * (1 - OCR_REGION_INK_RATIO)
+
+    bands = []
+    top = None
+    last_ink = None
+    for row, value in enumerate(profile):
+        if value >= blank_level:
+            continue
+        if top is None:
+            top = row
+        elif row - last_ink > OCR_REGION_MIN_GAP:
+            bands.append((top, last_ink + 1))
+            top = row
+        last_ink = row
+    if top is not None:
+        bands.append((top, last_ink + 1))
+    return bands
+
+def split_into_strips(img, max_strips):
+    """
+    Cuts an image into at most max_strips horizontal strips of similar height,
+    cutting only through the blank gaps between text bands so no line is split.
+    Returns:
+        list: (top, bottom) row ranges covering the whole image, in reading order.
+    """
+    bands = find_text_bands(img)
+    gap_cuts = [(upper[1] + lower[0]) // 2 for upper, lower in zip(bands, bands[1:])]
+    if max_strips <= 1 or not gap_cuts:
+        return [(0, img.height)]
+
+    cuts = set()
+    for k in range(1, max_strips):
+        target = img.height * k // max_strips
+        cuts.add(min(gap_cuts, key=lambda cut: abs(cut - target)))
+    edges = [0] + sorted(cuts) + [img.height]
+    return list(zip(edges, edges[1:]))
+
+def run_region_ocr(img, max_strips=None):
+    """
+    OCRs an image as horizontal strips in parallel and stitches the text back together
+    in reading order. Strips are cut in the blank gaps between text bands, so the stitched
+    text has the same lines as a single full-page OCR call, with a blank line at each cut.
+    """
+    max_strips = OCR_REGION_STRIPS if max_strips is None else max_strips
+    strips = split_into_strips(img, max_strips)
+    if len(strips) == 1:
+        return run_ocr(img)
+
+    crops = [img.crop((0, top, img.width, bottom)) for top, bottom in strips]
+    # Both backends release the GIL while Tesseract runs (a subprocess for pytesseract,
+    # the C++ API for tesserocr), so threads give real parallelism here.
+    texts = list(_get_strip_executor().map(run_ocr, crops))
+    # Each strip ends its last line with a newline; joining with another one keeps the blank
+    # line Tesseract puts between text blocks, and every cut falls between two blocks.
+    blocks = [text.rstrip("\n\x0c ") + "\n" for text in texts if text.strip("\n\x0c ")]
+    return "\n".join(blocks)
+
+def _describe_image_source(image_source):
+    """ Returns a short, printable description of an image source for log messages. """
+    if isinstance(image_source, (bytes, bytearray)):
+        return f"<{len(image_source)} bytes in memory>"
+    if isinstance(image_source, (str, os.PathLike)):
+        return str(image_source)
+    return f"<{type(image_source).__name__} stream>"
+
+def extract_text_from_image(image_source, preprocess=None, strips=None, on_stage=None):
     """
     Extracts text from an image using Tesseract OCR.
     Args:
-        image_path (str): The path to the image file.
+        image_source (str | bytes | file-like): The path to the image file, the raw image
+            bytes, or a binary file-like object (e.g. an uploaded request stream).
+        preprocess (iterable of str, optional): Preprocessing stages to apply before OCR
+            (see preprocess_image). Defaults to OCR_PREPROCESS_STAGES, which is empty unless
+            OCR_PREPROCESS is set; pass () to OCR the raw image.
+        strips (int, optional): OCR the image as up to this many horizontal strips in parallel
+            (see run_region_ocr). Defaults to OCR_REGION_STRIPS; 0 or 1 OCRs the whole image at once.
+        on_stage (callable, optional): Called with 'preprocessed' and then 'ocr_done' as each step finishes.
     Returns:
         str: The extracted text.
     Raises:
@@ -44,15 +358,22 @@ def extract_text_from_image(image_path):
         Exception: For other errors during image processing or OCR.
     """
     try:
-        img = Image.open(image_path)
-        # You can add language parameter here, e.g., lang='eng+fra'
-        text = pytesseract.image_to_string(img)
+        if isinstance(image_source, (bytes, bytearray)):
+            image_source = io.BytesIO(image_source)
+        img = preprocess_image(Image.open(image_source), preprocess)
+        if on_stage:
+            on_stage("preprocessed")
+        # Set OCR_LANG to change the language, e.g., OCR_LANG=eng+fra
+        strips = OCR_REGION_STRIPS if strips is None else strips
+        text = run_region_ocr(img, strips) if strips > 1 else run_ocr(img)
+        if on_stage:
+            on_stage("ocr_done")
         return text
     except pytesseract.TesseractNotFoundError as e:
         print(f"Tesseract OCR engine not found. Please install it: {e}")
         raise e
     except Exception as e:
-        print(f"Error processing image {image_path} for OCR: {e}")
+        print(f"Error processing image {_describe_image_source(image_source)} for OCR: {e}")
         raise e
 
 if __name__ == '__main__':
@@ -0,0 +1,266 @@
+# SmartSpendAnalyser/backend/app/receipt_parser.py
+"""
+Turns OCR'd receipt text into structured data: total, merchant, date and categorized items.
+
+All patterns are compiled once at import. The total and the date are searched for in the
+whole text, because OCR often puts a label and its value on separate lines ("TOTAL\\n45.00").
+Everything else comes from a single scan over the lines, which classifies each one as a
+merchant candidate (first few lines only), noise, or an item line.
+
+Every result is stamped with PARSER_VERSION and the category rules version, so receipts parsed
+by an older parser or with older rules can be found and re-parsed from their stored text.
+"""
+import re
+from datetime import datetime
+
+from .categorizer import get_rules, CategorizationContext, bill_level_items
+
+# Bump whenever a change here alters the output for some receipt text. Stored receipts with
+# another version are re-parsed from their extracted_text when they are next read.
+PARSER_VERSION = "2"
+
+# --- Total amount ---
+# Explicitly labelled totals win, then payment lines, then the largest amount on the receipt.
+TOTAL_PATTERN = re.compile(r'(?:total|amount|sum|grand total|net amount|bill amount)[:\s]*[A-Z]?\s*(\d+[,.]\d{2})', re.IGNORECASE)
+PAID_PATTERN = re.compile(r'(?:cash received|paid|balance due)[:\s]*[A-Z]?\s*(\d+[,.]\d{2})', re.IGNORECASE)
+# The same patterns for lowercased ASCII text, where they give the same matches. Case-sensitive
+# literal alternatives let the regex engine skip ahead instead of trying every position.
+_TOTAL_PATTERN_ASCII = re.compile(r'(?:total|amount|sum|grand total|net amount|bill amount)[:\s]*[a-z]?\s*(\d+[,.]\d{2})')
+_PAID_PATTERN_ASCII = re.compile(r'(?:cash received|paid|balance due)[:\s]*[a-z]?\s*(\d+[,.]\d{2})')
+MONEY_PATTERN = re.compile(r'\b\d+[,.]\d{2}\b')
+
+# --- Date ---
+# Tried in order; the first pattern found anywhere in the text is used.
+DATE_PATTERNS = [
+    re.compile(r'(\d{4}-\d{2}-\d{2})'),  # YYYY-MM-DD
+    re.compile(r'(\d{2}/\d{2}/\d{4})'),  # MM/DD/YYYY or DD/MM/YYYY
+    re.compile(r'(\d{2}-\d{2}-\d{4})'),  # DD-MM-YYYY or MM-DD-YYYY
+    re.compile(r'(\d{2}/\d{2}/\d{2})'),  # DD/MM/YY or MM/DD/YY
+    re.compile(r'(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})'), # DD Mon YYYY
+    re.compile(r'(\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4})') # Flexible d.m.y or d/m/y
+]
+_ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_SLASH_DATE = re.compile(r'\d{2}/\d{2}/\d{4}')
+_DASH_DATE = re.compile(r'\d{2}-\d{2}-\d{4}')
+_SHORT_SLASH_DATE = re.compile(r'\d{2}/\d{2}/\d{2}')
+_MONTH_NAME_DATE = re.compile(r'\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}', re.IGNORECASE)
+_GENERIC_DATE = re.compile(r'\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}')
+_DATE_SEPARATORS = re.compile(r'[-/.]')
+
+# --- Merchant ---
+MERCHANT_SCAN_LINES = 6
+# Header lines that hold a date, a time or an amount are not the merchant name...
+_HEADER_NUMBERS = re.compile(r'\d{2,4}[-/\.]\d{2}[-/\.]\d{2,4}|\d{1,2}:\d{2}|\d+\.\d{2}')
+# ...and neither are common receipt headers/footers.
+_HEADER_WORDS = re.compile(r'(?:gstin|tax|bill|receipt|invoice|total|subtotal|cash|change|thank you|visit again|phone|tel|email|www\.)')
+# Candidates with one of these words are preferred.
+_MERCHANT_WORDS = re.compile(r'pvt ltd|store|supermarket|cafe|restaurant|pharmacy|mart')
+
+# --- Items ---
+# Lines that are clearly not items (store info, payment details, contact info).
+_NON_ITEM_WORDS = re.compile(r'total|subtotal|tax|gst|cgst|sgst|cash|change|balance|amount|card|round off|thank you|manager|open 24 hours|phone|tel|email|www\.')
+# Lines that are just a date, a time or a number.
+_NOISE_LINE = re.compile(r'\d{2,4}[-/\.]\d{2}[-/\.]\d{2,4}$|\d{1,2}:\d{2}$|\d+(?:[,.]\d{2})?$')
+# Item name with optional quantity/code/tax flags, then price at end of line.
+# Optional currency symbols like $ or Rs. before the price. Used with match(): the name
+# group can absorb any prefix of a line, so if the pattern matches anywhere it matches at 0.
+ITEM_PATTERN = re.compile(r'(.+?)(?:\s+\d[\d\s]*[A-Z]?)?\s*(?:[Rs\$€¥£]\s*)?(\d+[,.]\d{2})(?:\s+[NRTX])?\s*$', re.IGNORECASE)
+ITEM_LINE_MIN_LENGTH = 3
+ITEM_LINE_MAX_LENGTH = 70
+
+
+def _to_amount(value):
+    """ Converts '12,50' or '12.50' to a float. """
+    return float(value.replace(',', '.'))
+
+
+def _extract_total(text, text_lower):
+    """ Returns the receipt total, or 0.0 if none is found. """
+    if text.isascii():
+        total_match = _TOTAL_PATTERN_ASCII.search(text_lower) or _PAID_PATTERN_ASCII.search(text_lower)
+    else:
+        total_match = TOTAL_PATTERN.search(text) or PAID_PATTERN.search(text)
+    if total_match:
+        return _to_amount(total_match.group(1))
+
+    # If no explicit total label, the largest amount is often the total
+    # Heuristic: total usually > 0.5, smaller values are likely quantities or small prices
+    potential_totals = [amount for amount in map(_to_amount, MONEY_PATTERN.findall(text)) if amount > 0.5]
+    return max(potential_totals) if potential_totals else 0.0
+
+
+# strptime formats for fixed-width numeric dates -> (separator, positions of year, month, day)
+_NUMERIC_DATE_FORMATS = {
+    '%Y-%m-%d': ('-', (0, 1, 2)),
+    '%d/%m/%Y': ('/', (2, 1, 0)),
+    '%m/%d/%Y': ('/', (2, 0, 1)),
+    '%d-%m-%Y': ('-', (2, 1, 0)),
+    '%m-%d-%Y': ('-', (2, 0, 1)),
+}
+
+
+def _strptime_date(date_str, fmt):
+    """
+    Returns datetime.strptime(date_str, fmt) as YYYY-MM-DD. ASCII strings in one of the
+    _NUMERIC_DATE_FORMATS are split directly instead, which gives the same result (including
+    the ValueError for dates that do not exist) without the cost of strptime.
+    """
+    layout = _NUMERIC_DATE_FORMATS.get(fmt)
+    if layout is None or not date_str.isascii():
+        return datetime.strptime(date_str, fmt).date().isoformat()
+    separator, (year, month, day) = layout
+    parts = date_str.split(separator)
+    return datetime(int(parts[year]), int(parts[month]), int(parts[day])).date().isoformat()
+
+
+def _parse_date_string(date_str):
+    """
+    Converts a matched date string to YYYY-MM-DD.
+    Returns None if the string matched but no day/month order fits it.
+    Raises:
+        ValueError: If the string is not a valid date; the next pattern is tried.
+    """
+    if _ISO_DATE.match(date_str):
+        return _strptime_date(date_str, '%Y-%m-%d')
+    if _SLASH_DATE.match(date_str): # Try both DMY and MDY
+        try: # DMY first
+            return _strptime_date(date_str, '%d/%m/%Y')
+        except ValueError: # Then MDY
+            return _strptime_date(date_str, '%m/%d/%Y')
+    if _DASH_DATE.match(date_str): # Try both DMY and MDY
+        try: # DMY first
+            return _strptime_date(date_str, '%d-%m-%Y')
+        except ValueError: # Then MDY
+            return _strptime_date(date_str, '%m-%d-%Y')
+    if _SHORT_SLASH_DATE.match(date_str):
+        day, month, year = map(int, date_str.split('/'))
+        full_year = 2000 + year if year < 100 else year # Assume 20xx for YY
+        return datetime(full_year, month, day).date().isoformat()
+    if _MONTH_NAME_DATE.match(date_str):
+        return _strptime_date(date_str, '%d %b %Y')
+    if _GENERIC_DATE.match(date_str): # Generic d.m.y or d/m/y
+        parts = _DATE_SEPARATORS.split(date_str)
+        if len(parts) == 3:
+            try:
+                # Try DD/MM/YYYY or DD.MM.YYYY
+                return datetime(int(parts[2]), int(parts[1]), int(parts[0])).date().isoformat()
+            except ValueError:
+                try:
+                    # Try MM/DD/YYYY or MM.DD.YYYY
+                    return datetime(int(parts[2]), int(parts[0]), int(parts[1])).date().isoformat()
+                except ValueError:
+                    pass
+    return None
+
+
+def _extract_date(text, default):
+    """ Returns the transaction date as YYYY-MM-DD, or default if none is found. """
+    for pattern in DATE_PATTERNS:
+        date_match = pattern.search(text)
+        if not date_match:
+            continue
+        try:
+            return _parse_date_string(date_match.group(0)) or default
+        except ValueError:
+            pass # Continue to next pattern if parsing fails
+    return default
+
+
+def parse_extracted_text(text, default_date=None):
+    """
+    This function parses extracted text to find total amount, merchant, date,
+    and individual items with their categories.
+    Args:
+        text (str): The OCR'd receipt text.
+        default_date (str, optional): YYYY-MM-DD date to use when the text has none. Defaults to
+            today; re-parses of stored receipts pass the upload date instead.
+    """
+    rules = get_rules() # One rule set for the whole receipt, even if a reload happens meanwhile
+    text_lower = text.lower()
+    lines = [line for line in map(str.strip, text.split('\n')) if line]
+
+    # 1. Total amount and date, from the whole text
+    total = _extract_total(text, text_lower)
+    transaction_date = _extract_date(text, default_date or datetime.utcnow().date().isoformat()) # Default to today
+
+    # 2. One pass over the lines: merchant candidates among the first few, then item lines
+    merchant_candidates = []
+    item_lines = []
+    for index, line in enumerate(lines):
+        line_lower = line.lower()
+        if index < MERCHANT_SCAN_LINES and 3 < len(line) < 50 and \
+                not _HEADER_NUMBERS.search(line) and not _HEADER_WORDS.match(line_lower):
+            merchant_candidates.append(line)
+
+        if not ITEM_LINE_MIN_LENGTH <= len(line) <= ITEM_LINE_MAX_LENGTH or \
+                _NON_ITEM_WORDS.search(line_lower) or _NOISE_LINE.match(line):
+            continue
+        item_match = ITEM_PATTERN.match(line)
+        if item_match:
+            item_name = item_match.group(1).strip()
+            item_price = _to_amount(item_match.group(2))
+            # Only add if price is positive and item name is not empty
+            if item_price > 0.01 and item_name:
+                item_lines.append((item_name, item_price))
+
+    merchant = "Unknown Merchant"
+    if merchant_candidates:
+        # Prefer lines with common merchant words, else the first candidate
+        merchant = next((candidate for candidate in merchant_candidates if _MERCHANT_WORDS.search(candidate.lower())),
+                        merchant_candidates[0])
+        # Special handling for "WAL*MART" -> "Walmart"
+        if "wal*mart" in text_lower or "wal mart" in text_lower:
+            merchant = "Walmart"
+
+    # 3. Overall bill category from the merchant, then the items (non-spend lines are dropped)
+    categorization = CategorizationContext(merchant, text, rules)
+    overall_category = categorization.overall_category
+    items = []
+    for item_name, item_price in item_lines:
+        item_category = categorization.categorize_item(item_name)
+        if item_category != "Non-Spend Item":
+            items.append({"name": item_name, "price": item_price, "category": item_category})
+
+    # Fallback for items if none were parsed specifically but a total exists
+    # And if the current items sum is significantly less than the total
+    items += bill_level_items(items, total, overall_category)
+
+    return {
+        "total_amount": total,
+        "merchant": merchant,
+        "date": transaction_date,
+        "category": overall_category, # This is the overall bill category
+        "items": items, # These are the categorized individual items
+        "original_text": text,
+        "parser_version": PARSER_VERSION, # Parser that produced this result
+        "rules_version": rules.version # Category rules that produced the categories above
+    }
+
+
+def transaction_date(parsed_data):
+    """
+    The receipt's transaction date as a BSON-friendly datetime at midnight (UTC), for the
+    indexed txn_date field stored next to parsed_data.
+    Returns:
+        datetime: From parsed_data['date'] (YYYY-MM-DD, optionally followed by a time, or a
+        datetime), or None if there is no valid date.
+    """
+    value = (parsed_data or {}).get("date")
+    if isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value[:10], '%Y-%m-%d')
+        except ValueError:
+            return None
+    return None
+
+
+def is_outdated(parsed_data, rules=None):
+    """
+    True if parsed_data was produced by another parser version or with other category rules
+    than the current ones, and so should be re-parsed from the stored text.
+    """
+    rules = rules or get_rules()
+    return not parsed_data or parsed_data.get("parser_version") != PARSER_VERSION or \
+        parsed_data.get("rules_version") != rules.version
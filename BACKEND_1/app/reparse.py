@@ -0,0 +1,225 @@
+# SmartSpendAnalyser/backend/app/reparse.py
+"""
+Lazy re-parsing of stored receipts when they are read.
+
+Every receipt keeps the OCR text it was parsed from, and its parsed_data is stamped with the
+parser and category rules versions that produced it. When a read path meets a receipt from
+an older version, the receipt is re-parsed from its stored text (never re-OCR'd), the caller
+gets the upgraded result, and the upgrade is written back to MongoDB in the background. The
+migration cost is therefore spread over normal traffic, and a receipt is re-parsed at most
+once per version change. Each write-back also moves the receipt's amounts between the rows
+of the user's spending rollups (see rollups.py).
+
+Write-backs that are still queued when the process exits are lost; those receipts are simply
+re-parsed again on their next read.
+"""
+import datetime
+import os
+import queue
+import threading
+
+from pymongo import ReturnDocument
+
+from . import database
+from .categorizer import get_rules
+from .receipt_parser import parse_extracted_text, is_outdated, transaction_date, PARSER_VERSION
+from .rollups import ROLLUP_PROJECTION, receipt_updates, write_updates
+
+# --- CONFIGURATION: Lazy Re-parse ---
+# Set REPARSE_ON_READ=false to serve stored parsed_data as is.
+REPARSE_ON_READ = os.getenv("REPARSE_ON_READ", "true").lower() not in ("0", "false", "no")
+# Upgraded receipts written back per batch (one rollups bulk_write each).
+REPARSE_WRITE_BATCH_SIZE = int(os.getenv("REPARSE_WRITE_BATCH_SIZE", 200))
+
+# What a projected read must include for upgrade_receipts to work
+REPARSE_FIELDS = ("timestamp", "parsed_data.parser_version", "parsed_data.rules_version")
+
+_write_queue = queue.Queue()
+_queued_ids = set() # Receipts with a write-back pending, so repeated reads queue them once
+_state_lock = threading.Lock()
+_writer_thread = None
+_stats = {"reparsed": 0, "written": 0, "write_errors": 0}
+
+
+def _upload_date(receipt):
+    """ The receipt's upload date as YYYY-MM-DD, the date it was dated with if its text had none. """
+    timestamp = receipt.get("timestamp")
+    if isinstance(timestamp, datetime.datetime):
+        return timestamp.date().isoformat()
+    return None
+
+
+def _reparse(receipts, texts):
+    """
+    Re-parses receipts in place from texts ({_id: extracted_text}), skipping receipts without text.
+    Returns:
+        list: (receipt _id, old parsed_data, new parsed_data) for every re-parsed receipt.
+    """
+    reparsed = []
+    for receipt in receipts:
+        extracted_text = texts.get(receipt["_id"])
+        if not extracted_text:
+            continue
+        try:
+            parsed_data = parse_extracted_text(extracted_text, _upload_date(receipt))
+        except Exception as e:
+            print(f"Error re-parsing receipt {receipt.get('_id')}: {e}")
+            continue
+        reparsed.append((receipt["_id"], receipt.get("parsed_data") or {}, parsed_data))
+        receipt["parsed_data"] = parsed_data
+
+    if reparsed:
+        with _state_lock:
+            _stats["reparsed"] += len(reparsed)
+    return reparsed
+
+
+def _write_upgrades(reparsed):
+    """
+    Writes re-parsed receipts back, then updates the spending rollups of those that were written.
+    Args:
+        reparsed (list): (receipt _id, old parsed_data, new parsed_data) tuples from _reparse.
+    Returns:
+        tuple: (written, failed) receipt counts.
+    """
+    written, failed = 0, 0
+    rollup_updates = []
+    for receipt_id, old_parsed_data, parsed_data in reparsed:
+        try:
+            # Only replace the versions that were read, so a newer write (another process, a
+            # backfill) is never overwritten. A missing field matches None. The pre-image tells
+            # whether this write won and what to take out of the rollups.
+            before = database.receipts_collection.find_one_and_update(
+                {
+                    "_id": receipt_id,
+                    "parsed_data.parser_version": old_parsed_data.get("parser_version"),
+                    "parsed_data.rules_version": old_parsed_data.get("rules_version")
+                },
+                {"$set": {"parsed_data": parsed_data, "txn_date": transaction_date(parsed_data)}},
+                projection=ROLLUP_PROJECTION,
+                return_document=ReturnDocument.BEFORE
+            )
+        except Exception as e:
+            print(f"Error writing back re-parsed receipt {receipt_id}: {e}")
+            failed += 1
+            continue
+        if before is not None:
+            written += 1
+            rollup_updates += receipt_updates(before, {**before, "parsed_data": parsed_data})
+    write_updates(rollup_updates)
+    return written, failed
+
+
+def upgrade_receipts(receipts):
+    """
+    Re-parses, in place, every receipt whose parsed_data is outdated and queues the upgraded
+    parsed_data to be written back.
+    Args:
+        receipts (list): Receipt documents as read from MongoDB, with their ObjectId '_id',
+            datetime 'timestamp' and at least the REPARSE_FIELDS of 'parsed_data'. If
+            'extracted_text' was not projected, it is fetched for the outdated receipts only.
+            Receipts without any extracted_text are left alone.
+    Returns:
+        int: The number of receipts that were re-parsed.
+    """
+    if not REPARSE_ON_READ:
+        return 0
+    rules = get_rules()
+    outdated = [receipt for receipt in receipts if is_outdated(receipt.get("parsed_data"), rules)]
+    if not outdated:
+        return 0
+
+    texts = {receipt["_id"]: receipt["extracted_text"] for receipt in outdated if "extracted_text" in receipt}
+    # Receipts read with a projection that left out extracted_text: fetch just the text of the
+    # outdated ones, which are few once most receipts have been upgraded.
+    missing_text = [receipt["_id"] for receipt in outdated if "extracted_text" not in receipt]
+    if missing_text and database.receipts_collection is not None:
+        try:
+            texts.update((doc["_id"], doc.get("extracted_text")) for doc in
+                         database.receipts_collection.find({"_id": {"$in": missing_text}}, {"extracted_text": 1}))
+        except Exception as e:
+            print(f"Error fetching the text of {len(missing_text)} outdated receipts: {e}")
+
+    reparsed = _reparse(outdated, texts)
+    for receipt_id, old_parsed_data, parsed_data in reparsed:
+        _queue_write_back(receipt_id, old_parsed_data, parsed_data)
+    return len(reparsed)
+
+
+def upgrade_user_receipts(user_object_id):
+    """
+    Re-parses a user's outdated receipts and writes them back before returning. Used ahead of
+    aggregation pipelines, which read parsed_data straight from MongoDB and so cannot be
+    upgraded on the way out. The query is answered from the user_id_parse_versions index, so
+    once everything is current it costs one short index scan.
+    Args:
+        user_object_id (ObjectId): The user whose receipts to upgrade.
+    Returns:
+        int: The number of receipts that were re-parsed.
+    """
+    if not REPARSE_ON_READ or database.receipts_collection is None:
+        return 0
+    rules = get_rules()
+    query = {"$or": [
+        {"user_id": user_object_id, "parsed_data.parser_version": {"$ne": PARSER_VERSION}},
+        {"user_id": user_object_id, "parsed_data.parser_version": PARSER_VERSION,
+         "parsed_data.rules_version": {"$ne": rules.version}}
+    ]}
+    try:
+        outdated = list(database.receipts_collection.find(
+            query, {"extracted_text": 1, "timestamp": 1, "parsed_data.parser_version": 1, "parsed_data.rules_version": 1}
+        ))
+    except Exception as e:
+        print(f"Error finding outdated receipts for user {user_object_id}: {e}")
+        return 0
+    if not outdated:
+        return 0
+
+    reparsed = _reparse(outdated, {receipt["_id"]: receipt.get("extracted_text") for receipt in outdated})
+    if reparsed:
+        written, failed = _write_upgrades(reparsed)
+        with _state_lock:
+            _stats["written"] += written
+            _stats["write_errors"] += failed
+    return len(reparsed)
+
+
+def _queue_write_back(receipt_id, old_parsed_data, parsed_data):
+    global _writer_thread
+    with _state_lock:
+        if receipt_id in _queued_ids:
+            return
+        _queued_ids.add(receipt_id)
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_write_back_loop, name="receipt-reparse-writer", daemon=True)
+            _writer_thread.start()
+    _write_queue.put((receipt_id, old_parsed_data, parsed_data))
+
+
+def _write_back_loop():
+    """ Writer thread: drains the queue in batches of up to REPARSE_WRITE_BATCH_SIZE, one rollup write per batch. """
+    while True:
+        batch = [_write_queue.get()]
+        while len(batch) < REPARSE_WRITE_BATCH_SIZE:
+            try:
+                batch.append(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if database.receipts_collection is None:
+            written, failed = 0, len(batch)
+        else:
+            written, failed = _write_upgrades(batch)
+
+        with _state_lock:
+            _queued_ids.difference_update(receipt_id for receipt_id, _, _ in batch)
+            _stats["written"] += written
+            _stats["write_errors"] += failed
+
+
+def get_reparse_stats():
+    """ Returns how many receipts were re-parsed on read and written back, and how many are pending. """
+    with _state_lock:
+        stats = dict(_stats)
+        stats["pending_writes"] = len(_queued_ids)
+    return stats
@@ -0,0 +1,309 @@
+# SmartSpendAnalyser/backend/app/rollups.py
+"""
+Per-user spending rollups, kept up to date as receipts are written.
+
+SpendingRollups holds one row per (user_id, day, category) with:
+  - amount, count: spending attributed to the category, as in the pie chart (item prices
+    by item category, or the bill total by bill category for receipts without items;
+    only positive amounts, never "Non-Spend Item")
+  - bill_amount, bill_count: the total_amount of the receipts whose bill category it is;
+    their sum over a day is that day's spending
+  - order: where the category first shows up going through the user's receipts newest
+    first (by timestamp, then _id) and their items in order, among the lines counted in
+    amount; the pie chart lists categories by it, as the loop over receipts once did
+day is the receipt's txn_date (None for receipts without a valid date).
+
+Every write that changes a receipt's parsed_data also $inc's the rows it moves between,
+with upserts, so dashboard reads touch a few rows per day rather than every receipt. order
+only goes up with $max; when the line that set it leaves a row, the row's order is
+recomputed from that day's receipts. Each row update is atomic, but a receipt and its rows
+are not updated in one transaction, so a crash between the two can leave rollups off. The
+check below finds such drift, and rows written before order existed.
+
+Usage:
+    python -m app.rollups [--rebuild] [--user ID]
+
+Without --rebuild, compares the stored rollups with ones recomputed from Receipts and exits
+with status 1 if any user differs. With --rebuild, rewrites the rollups from Receipts; run it
+once after deploying, so rollups cover the receipts stored before they existed.
+"""
+import argparse
+import math
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+from itertools import groupby
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne, DeleteOne
+
+from . import database
+from .receipt_parser import transaction_date
+
+# What receipt_rows reads from a receipt
+ROLLUP_PROJECTION = {
+    "user_id": 1,
+    "timestamp": 1,
+    "parsed_data.date": 1,
+    "parsed_data.total_amount": 1,
+    "parsed_data.category": 1,
+    "parsed_data.items.category": 1,
+    "parsed_data.items.price": 1
+}
+_AMOUNT_FIELDS = ("amount", "count", "bill_amount", "bill_count")
+# Item indexes are inverted in order keys so that earlier items sort higher
+_MAX_ITEM_INDEX = 999999
+
+# A row whose order was `order` before a receipt left it, to be recomputed by write_updates
+OrderRefresh = namedtuple("OrderRefresh", ["user_id", "day", "category", "order"])
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def line_order(receipt, index):
+    """
+    The order key of a receipt's line: a string that sorts the way the receipts' lines come,
+    newest receipt (by timestamp, then _id) first and then by item index, from highest to
+    lowest. Timestamps are cut to milliseconds, as MongoDB stores them.
+    """
+    timestamp = receipt.get("timestamp")
+    if isinstance(timestamp, datetime):
+        stamp = f"{timestamp:%Y-%m-%dT%H:%M:%S}.{timestamp.microsecond // 1000:03d}"
+    else:
+        stamp = "0000-00-00T00:00:00.000"
+    return f"{stamp}|{receipt.get('_id', '')}|{_MAX_ITEM_INDEX - index:06d}"
+
+
+def receipt_rows(receipt):
+    """
+    Works out what one receipt adds to its user's rollups.
+    Args:
+        receipt (dict): A receipt with its '_id' and at least the ROLLUP_PROJECTION fields, or None.
+    Returns:
+        dict: {(day, category): {'amount', 'count', 'bill_amount', 'bill_count'}}, plus the
+        'order' of the first line counted in amount, if any.
+    """
+    rows = {}
+    parsed_data = (receipt or {}).get("parsed_data") or {}
+    if not parsed_data:
+        return rows
+    day = transaction_date(parsed_data)
+
+    def add(category, amount_field, count_field, amount):
+        row = rows.setdefault((day, category), dict.fromkeys(_AMOUNT_FIELDS, 0))
+        row[amount_field] += amount
+        row[count_field] += 1
+        return row
+
+    items = parsed_data.get("items")
+    if isinstance(items, list) and items:
+        lines = [(item.get("category", "Uncategorized"), _number(item.get("price", 0.0))) for item in items]
+    elif "category" in parsed_data and "total_amount" in parsed_data:
+        lines = [(parsed_data["category"], _number(parsed_data["total_amount"]))]
+    else:
+        lines = []
+    for index, (category, amount) in enumerate(lines):
+        if amount is not None and amount > 0 and category != "Non-Spend Item":
+            row = add(category, "amount", "count", amount)
+            row.setdefault("order", line_order(receipt, index))
+
+    total_amount = _number(parsed_data.get("total_amount"))
+    if total_amount is not None:
+        add(parsed_data.get("category"), "bill_amount", "bill_count", total_amount)
+    return rows
+
+
+def receipt_updates(old_receipt, new_receipt):
+    """
+    The $inc upserts that move a receipt's contribution from its old to its new parsed_data.
+    Args:
+        old_receipt (dict): The receipt as stored before the write, None for a new receipt.
+        new_receipt (dict): The receipt as written, with its '_id', 'user_id' and 'timestamp'.
+    Returns:
+        list: UpdateOne operations for the SpendingRollups collection, and an OrderRefresh
+        for each row whose order the old receipt may have set and the new one no longer
+        reaches. Pass them all to write_updates.
+    """
+    old_rows, new_rows = receipt_rows(old_receipt), receipt_rows(new_receipt)
+    updates = []
+    for day, category in {**old_rows, **new_rows}:
+        old = old_rows.get((day, category), {})
+        new = new_rows.get((day, category), {})
+        inc = {field: new.get(field, 0) - old.get(field, 0) for field in _AMOUNT_FIELDS}
+        if not any(inc.values()) and new.get("order") == old.get("order"):
+            continue
+        update = {"$inc": inc}
+        if new.get("order"):
+            update["$max"] = {"order": new["order"]}
+        updates.append(UpdateOne({"user_id": new_receipt["user_id"], "day": day, "category": category},
+                                 update, upsert=True))
+        if old.get("order") and (new.get("order") or "") < old["order"]:
+            updates.append(OrderRefresh(new_receipt["user_id"], day, category, old["order"]))
+    return updates
+
+
+def write_updates(updates):
+    """ Applies operations from receipt_updates. Returns False (and logs) if they could not be written. """
+    if not updates:
+        return True
+    if database.rollups_collection is None:
+        print("Cannot update spending rollups: rollups_collection is not initialized.")
+        return False
+    operations = [update for update in updates if not isinstance(update, OrderRefresh)]
+    refreshes = [update for update in updates if isinstance(update, OrderRefresh)]
+    try:
+        if operations:
+            database.rollups_collection.bulk_write(operations, ordered=False)
+        if refreshes:
+            _refresh_orders(refreshes)
+        return True
+    except Exception as e:
+        print(f"Error updating spending rollups ({len(updates)} rows): {e}")
+        return False
+
+
+def _refresh_orders(refreshes):
+    """
+    Recomputes the order of the rows whose order was set by a line that has left them, from the
+    receipts of their user and day. A row whose order has moved on since is left alone.
+    """
+    rows = list(database.rollups_collection.find(
+        {"$or": [{"user_id": refresh.user_id, "day": refresh.day, "category": refresh.category, "order": refresh.order}
+                 for refresh in refreshes]},
+        {"user_id": 1, "day": 1, "category": 1, "order": 1}
+    ))
+    if not rows:
+        return
+    user_days = {(row["user_id"], row["day"]) for row in rows}
+    receipts = database.receipts_collection.find(
+        {"$or": [{"user_id": user_id, "txn_date": day} for user_id, day in user_days]}, ROLLUP_PROJECTION)
+    orders = {}
+    for receipt in receipts:
+        for (day, category), row in receipt_rows(receipt).items():
+            key = (receipt["user_id"], day, category)
+            if row.get("order") and row["order"] > orders.get(key, ""):
+                orders[key] = row["order"]
+    database.rollups_collection.bulk_write([
+        UpdateOne({"_id": row["_id"], "order": row["order"]},
+                  {"$set": {"order": orders.get((row["user_id"], row["day"], row["category"]), "")}})
+        for row in rows
+    ], ordered=False)
+
+
+def compute_rollups(receipts):
+    """
+    Rollups of a set of receipts from scratch.
+    Returns:
+        dict: {(day, category): row} with the fields of a SpendingRollups row.
+    """
+    rollups = {}
+    for receipt in receipts:
+        for key, row in receipt_rows(receipt).items():
+            total = rollups.setdefault(key, dict.fromkeys(_AMOUNT_FIELDS, 0))
+            for field in _AMOUNT_FIELDS:
+                total[field] += row[field]
+            if row.get("order", "") > total.get("order", ""):
+                total["order"] = row["order"]
+    return rollups
+
+
+def _stored_rollups(user_id):
+    """ The user's stored rows, {(day, category): row}, leaving out rows emptied by updates. """
+    return {(row["day"], row["category"]): row
+            for row in database.rollups_collection.find({"user_id": user_id})
+            if row.get("count") or row.get("bill_count")}
+
+
+def differences(expected, stored):
+    """ Lists the (day, category) rows where stored rollups disagree with recomputed ones. """
+    problems = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (k[0] is not None, k[0] or 0, str(k[1]))):
+        want, have = expected.get(key, {}), stored.get(key, {})
+        for field in _AMOUNT_FIELDS:
+            # $inc adds in a different order than a fresh sum, so amounts may differ in the last bits
+            if not math.isclose(want.get(field, 0), have.get(field, 0), rel_tol=1e-9, abs_tol=1e-6):
+                problems.append(f"{key[0].date() if key[0] else None} {key[1]!r}: {field} "
+                                f"{have.get(field, 0)!r}, expected {want.get(field, 0)!r}")
+        if want.get("count") and want.get("order") != have.get("order"):
+            problems.append(f"{key[0].date() if key[0] else None} {key[1]!r}: order "
+                            f"{have.get('order')!r}, expected {want.get('order')!r}")
+    return problems
+
+
+def rebuild_user(user_id, expected):
+    """ Replaces a user's rows with the expected ones, without a window in which they are missing. """
+    stored = {(row["day"], row["category"]): row["_id"]
+              for row in database.rollups_collection.find({"user_id": user_id}, {"day": 1, "category": 1})}
+    operations = [UpdateOne({"user_id": user_id, "day": day, "category": category},
+                            {"$set": {**dict.fromkeys(_AMOUNT_FIELDS, 0), "order": "", **row}}, upsert=True)
+                  for (day, category), row in expected.items()]
+    operations += [DeleteOne({"_id": row_id}) for key, row_id in stored.items() if key not in expected]
+    if operations:
+        database.rollups_collection.bulk_write(operations, ordered=False)
+
+
+def check_rollups(user_id=None, rebuild=False):
+    """
+    Recomputes the rollups of every user (or one) from Receipts and compares or rewrites them.
+    Returns:
+        dict: Counts of 'users' checked, 'mismatched' users and 'rebuilt' users.
+    """
+    counts = {"users": 0, "mismatched": 0, "rebuilt": 0}
+    started = time.time()
+    query = {"user_id": user_id} if user_id is not None else {}
+    users_with_rollups = set(database.rollups_collection.distinct("user_id", query))
+    cursor = database.receipts_collection.find(query, ROLLUP_PROJECTION, no_cursor_timeout=True).sort("user_id", 1)
+    try:
+        for receipts_user_id, receipts in groupby(cursor, key=lambda receipt: receipt.get("user_id")):
+            users_with_rollups.discard(receipts_user_id)
+            _check_user(receipts_user_id, compute_rollups(receipts), rebuild, counts)
+    finally:
+        cursor.close()
+    # Rollups of users without any receipts left
+    for orphan_user_id in users_with_rollups:
+        _check_user(orphan_user_id, {}, rebuild, counts)
+
+    print(f"Rollup {'rebuild' if rebuild else 'check'} complete: {counts['users']} users, "
+          f"{counts['mismatched']} mismatched, {counts['rebuilt']} rebuilt, in {time.time() - started:.1f}s.")
+    return counts
+
+
+def _check_user(user_id, expected, rebuild, counts):
+    counts["users"] += 1
+    problems = differences(expected, _stored_rollups(user_id))
+    if problems:
+        counts["mismatched"] += 1
+        print(f"User {user_id}: {len(problems)} rollup rows differ")
+        for problem in problems[:5]:
+            print(f"  {problem}")
+    if rebuild:
+        rebuild_user(user_id, expected)
+        counts["rebuilt"] += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rebuild', action='store_true', help="Rewrite the rollups from the Receipts collection")
+    parser.add_argument('--user', default=None, help="Only this user ID")
+    args = parser.parse_args(argv)
+    if args.user is not None and not ObjectId.is_valid(args.user):
+        parser.error(f"invalid user ID: {args.user}")
+
+    database.initialize_db()
+    if database.receipts_collection is None:
+        return 1
+    try:
+        counts = check_rollups(ObjectId(args.user) if args.user else None, args.rebuild)
+    except KeyboardInterrupt:
+        print("Interrupted.")
+        return 130
+    finally:
+        database.client.close()
+    return 1 if counts["mismatched"] and not args.rebuild else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# SmartSpendAnalyser/backend/benchmarks/bench_categorize.py
+"""
+Compares item categorization throughput of the compiled matcher in app.categorizer
+against the original chained `in` checks (a frozen copy in baseline_categorizer.py), and
+measures the item category cache on a repetitive item mix like real receipts.
+
+Usage:
+    python benchmarks/bench_categorize.py [--items N] [--repeat N] [--seed N]
+
+Exits with status 1 if the two implementations disagree on any item.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.categorizer import (
+    CategorizationContext,
+    _cached_item_category,
+    _item_category,
+    categorize_item,
+    get_categorization_cache_stats,
+    get_rules,
+)
+from baseline_categorizer import categorize_item as categorize_item_linear
+
+RULES = get_rules()
+
+SAMPLE_ITEMS = [
+    "MILK 1L", "AMUL BUTTER 500G", "PETROL", "CHICKEN BIRYANI", "USB CABLE TYPE C", "SHAMPOO 200ML",
+    "NOTEBOOK A4", "BUS TICKET", "MOVIE TICKET", "NETFLIX SUBSCRIPTION", "DETERGENT 1KG", "PARACETAMOL 500",
+    "COTTON SHIRT", "HAMMER", "GIFT WRAP", "MOBILE RECHARGE", "CAPPUCCINO", "BASMATI RICE 5KG",
+    "LED BULB 9W", "HOTEL ROOM", "TOOTHPASTE", "SCHOOL FEE", "ROUND OFF", "12.50", "MISC ITEM 0042",
+]
+MERCHANT_CATEGORIES = [
+    "Grocery/Supermarket", "Online Shopping", "General", "Food & Dining", "Electronics", "Health & Fitness",
+]
+
+
+def categorize_item_uncached(item_name, merchant_category, whole_text):
+    """ The compiled matcher without the item category cache. """
+    return _item_category(RULES, item_name.lower(), merchant_category, RULES.store_for_category(merchant_category))
+
+
+def build_items(count, seed):
+    """ Sample items plus synthetic names mixing rule keywords with typical receipt noise. """
+    rng = random.Random(seed)
+    keywords = sorted({term if isinstance(term, str) else term["keyword"]
+                       for _, terms in RULES.item_rules for term in terms})
+    noise = ["1L", "500G", "PKT", "X2", "ORG", "PREMIUM", "AMUL", "FRESH", "200ML", "NO 7"]
+    items = list(SAMPLE_ITEMS)
+    while len(items) < count:
+        parts = rng.sample(keywords, rng.randint(0, 2)) + rng.sample(noise, rng.randint(1, 2))
+        rng.shuffle(parts)
+        items.append(" ".join(parts).upper())
+    return [(item, MERCHANT_CATEGORIES[i % len(MERCHANT_CATEGORIES)]) for i, item in enumerate(items[:count])]
+
+
+def build_receipt_stream(items, count, seed):
+    """ Draws items with a Zipf-like popularity, so a few names make up most lines as on real receipts. """
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(items))]
+    return rng.choices(items, weights=weights, k=count)
+
+
+def measure(func, items, repeat):
+    """ Returns the best items/sec over `repeat` runs. """
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item, merchant_category in items:
+            func(item, merchant_category, "")
+        best = max(best, len(items) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=20000, help="Number of item names to categorize")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per implementation (best is reported)")
+    parser.add_argument('--seed', type=int, default=7, help="Seed for the synthetic item names")
+    args = parser.parse_args()
+
+    items = build_items(args.items, args.seed)
+    mismatches = [(item, merchant_category) for item, merchant_category in items
+                  if not categorize_item_linear(item, merchant_category, "")
+                  == categorize_item_uncached(item, merchant_category, "")
+                  == categorize_item(item, merchant_category, "")]
+    if mismatches:
+        print(f"FAIL: {len(mismatches)} item(s) categorized differently, e.g. {mismatches[:5]}")
+        return 1
+
+    before = measure(categorize_item_linear, items, args.repeat)
+    after = measure(categorize_item_uncached, items, args.repeat)
+
+    # Item category cache on a repetitive mix, starting cold.
+    stream = build_receipt_stream(items, len(items), args.seed)
+    _cached_item_category.cache_clear()
+    stream_before = measure(categorize_item_uncached, stream, 1)
+    cached = measure(categorize_item, stream, 1)
+    stats = get_categorization_cache_stats()
+
+    # Per-receipt context on a warm cache.
+    contexts = {category: CategorizationContext.for_category(category, RULES) for category in MERCHANT_CATEGORIES}
+    with_context = measure(lambda item, merchant_category, _: contexts[merchant_category].categorize_item(item),
+                           stream, args.repeat)
+
+    print(f"{len(items)} items, identical results")
+    print(f"linear scan     : {before:>12,.0f} items/sec")
+    print(f"compiled matcher: {after:>12,.0f} items/sec  ({after / before:.1f}x)")
+    print(f"repetitive mix, {len(set(stream))} distinct of {len(stream)} lines:")
+    print(f"  no cache      : {stream_before:>12,.0f} items/sec")
+    print(f"  cold cache    : {cached:>12,.0f} items/sec  ({cached / stream_before:.1f}x, hit rate {stats['hit_rate']:.1%})")
+    print(f"  warm, context : {with_context:>12,.0f} items/sec  ({with_context / stream_before:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# SmartSpendAnalyser/backend/benchmarks/bench_merchant_index.py
+"""
+Measures fuzzy merchant lookup latency of the trigram index in app.merchant_index as the
+list of known merchants grows, against a brute-force scan scoring every name.
+
+Queries are known names with OCR-style noise (0/o swaps, dropped and doubled letters)
+embedded in a longer merchant line, plus names that are not in the list at all.
+
+Usage:
+    python benchmarks/bench_merchant_index.py [--sizes 100,1000,5000,20000] [--queries N] [--seed N]
+
+Exits with status 1 if the index and the brute-force scan disagree on any query.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.categorizer import MERCHANT_FUZZY_THRESHOLD
+from app.merchant_index import TrigramIndex, fold_ocr_text, substring_distance
+
+SUFFIXES = ["", " pvt ltd", " store #12", " supermarket", " - koramangala", " 24x7"]
+
+
+def make_names(count, rng):
+    """ Unique pronounceable merchant names of one to three words. """
+    consonants, vowels = "bcdfghjklmnprstvwyz", "aeiou"
+    names = set()
+    while len(names) < count:
+        words = ["".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 4)))
+                 for _ in range(rng.randint(1, 3))]
+        names.add(" ".join(words))
+    return sorted(names)
+
+
+def add_ocr_noise(name, rng):
+    """ One or two OCR-style errors: a confusable swap, a dropped letter or a doubled letter. """
+    chars = list(name)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        action = rng.choice(["swap", "drop", "double"])
+        if action == "swap":
+            chars[i] = {"o": "0", "l": "1", "s": "5", "b": "8", "g": "6"}.get(chars[i], rng.choice(string.ascii_lowercase))
+        elif action == "drop" and len(chars) > 5:
+            del chars[i]
+        else:
+            chars.insert(i, chars[i])
+    return "".join(chars)
+
+
+def brute_force_match(names, query, threshold):
+    """ Reference: scores every name, with the same similarity and tie-breaks as the index. """
+    folded_query = fold_ocr_text(query)
+    best_key = None
+    for name_id, name in enumerate(names):
+        folded = fold_ocr_text(name)
+        if len(folded) < 5:
+            continue
+        similarity = 1 - substring_distance(folded, folded_query) / len(folded)
+        key = (similarity, len(folded), -name_id)
+        if similarity >= threshold and (best_key is None or key > best_key):
+            best_key = key
+    return (names[-best_key[2]], best_key[0]) if best_key else None
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def time_lookups(lookup, queries):
+    """ Returns the per-query latencies in microseconds and the results. """
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(lookup(query))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default="100,1000,5000,20000", help="Comma separated merchant list sizes")
+    parser.add_argument('--queries', type=int, default=200, help="Lookups per list size")
+    parser.add_argument('--brute-force-limit', type=int, default=5000,
+                        help="Largest list size to also scan brute force (it is slow)")
+    parser.add_argument('--seed', type=int, default=7, help="Seed for the synthetic names and noise")
+    args = parser.parse_args()
+
+    threshold = MERCHANT_FUZZY_THRESHOLD or 0.85
+    print(f"similarity threshold {threshold}")
+    print(f"{'merchants':>10} {'build ms':>9} {'index mean us':>14} {'index p99 us':>13} "
+          f"{'brute mean us':>14} {'speedup':>8} {'recall':>7}")
+
+    failures = 0
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rng = random.Random(args.seed)
+        names = make_names(size, rng)
+        start = time.perf_counter()
+        index = TrigramIndex(names)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        targets = [rng.choice(names) for _ in range(args.queries)]
+        queries = [add_ocr_noise(name, rng) + rng.choice(SUFFIXES) for name in targets[:args.queries * 3 // 4]]
+        queries += [name + rng.choice(SUFFIXES) for name in make_names(args.queries - len(queries), random.Random(-size))]
+
+        index_latencies, index_results = time_lookups(lambda q: index.best_match(q, threshold), queries)
+        recall = sum(1 for result, name in zip(index_results, targets) if result and result[0] == name)
+        recall /= args.queries * 3 // 4
+
+        brute_mean = speedup = "-"
+        if size <= args.brute_force_limit:
+            brute_latencies, brute_results = time_lookups(lambda q: brute_force_match(names, q, threshold), queries)
+            disagreements = [(q, a, b) for q, a, b in zip(queries, index_results, brute_results) if a != b]
+            if disagreements:
+                failures += len(disagreements)
+                print(f"FAIL: {len(disagreements)} lookup(s) differ from brute force, e.g. {disagreements[:3]}")
+            brute_mean = f"{sum(brute_latencies) / len(brute_latencies):,.0f}"
+            speedup = f"{sum(brute_latencies) / sum(index_latencies):.0f}x"
+
+        print(f"{size:>10} {build_ms:>9,.0f} {sum(index_latencies) / len(index_latencies):>14,.0f} "
+              f"{percentile(index_latencies, 0.99):>13,.0f} {brute_mean:>14} {speedup:>8} {recall:>7.1%}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
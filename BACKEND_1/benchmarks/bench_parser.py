@@ -0,0 +1,179 @@
+# SmartSpendAnalyser/backend/benchmarks/bench_parser.py
+"""
+Golden-corpus benchmark for receipt parsing and categorization.
+
+Parses every OCR text dump in benchmarks/corpus/receipts/ with app.receipt_parser, compares
+the results with benchmarks/corpus/expected.json, and reports receipts/sec, items/sec and
+per-receipt latency. Runs offline: it needs neither MongoDB nor Tesseract.
+
+The corpus holds anonymized OCR dumps of real-world receipt layouts and a few synthetic long
+receipts (synthetic_long_*.txt). Every receipt carries a date, since receipts without one are
+dated today and could not have a fixed expected output.
+
+Fails (exit status 1) if any receipt parses differently from its expected output, or if
+receipts/sec drops, or p99 latency rises, by more than --max-slowdown against
+benchmarks/corpus/baseline.json. The baseline is machine specific: record one on the
+machine that runs the comparison.
+
+Usage:
+    python benchmarks/bench_parser.py [--repeat N] [--max-slowdown 0.25]
+    python benchmarks/bench_parser.py --update-expected   # after an intended output change
+    python benchmarks/bench_parser.py --update-baseline   # record this machine's timings
+
+Output depends on the category rules and on MERCHANT_FUZZY_THRESHOLD; run with the defaults.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.categorizer import _cached_item_category
+from app.receipt_parser import parse_extracted_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+RECEIPTS_DIR = os.path.join(CORPUS_DIR, 'receipts')
+EXPECTED_PATH = os.path.join(CORPUS_DIR, 'expected.json')
+BASELINE_PATH = os.path.join(CORPUS_DIR, 'baseline.json')
+
+
+def load_corpus():
+    """ Returns a list of (name, text) pairs, sorted by name. """
+    corpus = []
+    for name in sorted(os.listdir(RECEIPTS_DIR)):
+        if name.endswith('.txt'):
+            with open(os.path.join(RECEIPTS_DIR, name), encoding='utf-8') as f:
+                corpus.append((name, f.read()))
+    return corpus
+
+
+def comparable(parsed):
+    """ The parse result without 'original_text', which is just the input echoed back. """
+    return {key: value for key, value in parsed.items() if key != 'original_text'}
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+
+
+def check_outputs(corpus, expected):
+    """ Returns a list of human-readable differences between actual and expected outputs. """
+    problems = []
+    for name, text in corpus:
+        actual = parse_extracted_text(text)
+        if actual.get('original_text') != text:
+            problems.append(f"{name}: original_text does not echo the input")
+        if name not in expected:
+            problems.append(f"{name}: no expected output (run with --update-expected)")
+            continue
+        actual = comparable(actual)
+        for key in sorted(set(actual) | set(expected[name])):
+            if actual.get(key) != expected[name].get(key):
+                problems.append(f"{name}: {key} is {actual.get(key)!r}, expected {expected[name].get(key)!r}")
+    for name in sorted(set(expected) - {name for name, _ in corpus}):
+        problems.append(f"{name}: expected output but no receipt file")
+    return problems
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(corpus, repeat):
+    """
+    Parses the corpus `repeat` times. The item category cache is cleared before each pass so
+    every pass does the full categorization work.
+    Returns:
+        dict: receipts_per_sec, items_per_sec, p50_ms and p99_ms per receipt.
+    """
+    latencies = []
+    items = 0
+    elapsed = 0.0
+    for _ in range(repeat):
+        _cached_item_category.cache_clear()
+        for _, text in corpus:
+            start = time.perf_counter()
+            parsed = parse_extracted_text(text)
+            took = time.perf_counter() - start
+            latencies.append(took)
+            elapsed += took
+            items += len(parsed['items'])
+    return {
+        "receipts_per_sec": round(len(latencies) / elapsed, 1),
+        "items_per_sec": round(items / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=50, help="Timed passes over the corpus")
+    parser.add_argument('--max-slowdown', type=float, default=0.25,
+                        help="Allowed drop in receipts/sec (and rise in p99) against the baseline, as a fraction")
+    parser.add_argument('--update-expected', action='store_true', help="Rewrite expected.json from the current parser")
+    parser.add_argument('--update-baseline', action='store_true', help="Rewrite baseline.json with this run's timings")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if args.update_expected:
+        write_json(EXPECTED_PATH, {name: comparable(parse_extracted_text(text)) for name, text in corpus})
+        print(f"Wrote expected outputs for {len(corpus)} receipts to {EXPECTED_PATH}")
+
+    failed = False
+    problems = check_outputs(corpus, load_json(EXPECTED_PATH) or {})
+    if problems:
+        failed = True
+        print(f"FAIL: {len(problems)} output difference(s):")
+        for problem in problems[:50]:
+            print(f"  {problem}")
+    else:
+        print(f"{len(corpus)} receipts, outputs match expected.json")
+
+    # One untimed pass so imports, rule loading and regex caches are warm.
+    for _, text in corpus:
+        parse_extracted_text(text)
+    result = measure(corpus, args.repeat)
+    print(f"receipts/sec : {result['receipts_per_sec']:>12,.1f}")
+    print(f"items/sec    : {result['items_per_sec']:>12,.1f}")
+    print(f"p50 latency  : {result['p50_ms']:>12.3f} ms")
+    print(f"p99 latency  : {result['p99_ms']:>12.3f} ms")
+
+    if args.update_baseline:
+        result["recorded_on"] = f"{platform.machine()} / {platform.python_implementation()} {platform.python_version()}"
+        write_json(BASELINE_PATH, result)
+        print(f"Wrote baseline to {BASELINE_PATH}")
+        return 1 if failed else 0
+
+    baseline = load_json(BASELINE_PATH)
+    if baseline is None:
+        print("No baseline.json; run with --update-baseline to record one.")
+    else:
+        min_rate = baseline["receipts_per_sec"] * (1 - args.max_slowdown)
+        max_p99 = baseline["p99_ms"] * (1 + args.max_slowdown)
+        print(f"baseline     : {baseline['receipts_per_sec']:,.1f} receipts/sec, p99 {baseline['p99_ms']:.3f} ms "
+              f"({baseline.get('recorded_on', 'unknown machine')})")
+        if result["receipts_per_sec"] < min_rate:
+            failed = True
+            print(f"FAIL: receipts/sec {result['receipts_per_sec']:,.1f} is below {min_rate:,.1f}")
+        if result["p99_ms"] > max_p99:
+            failed = True
+            print(f"FAIL: p99 latency {result['p99_ms']:.3f} ms is above {max_p99:.3f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
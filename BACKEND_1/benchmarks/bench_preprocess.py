@@ -0,0 +1,100 @@
+# SmartSpendAnalyser/backend/benchmarks/bench_preprocess.py
+"""
+Measures how each image preprocessing stage affects OCR wall time and accuracy.
+
+Usage:
+    python benchmarks/bench_preprocess.py <image_dir> [--repeat N]
+
+<image_dir> holds receipt images (png/jpg/jpeg/gif) and, for each one, a ground-truth
+transcription with the same base name and a .txt extension. Images without a .txt file
+are still timed but left out of the accuracy column.
+"""
+import argparse
+import difflib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from app.ocr_utils import PREPROCESS_STAGE_ORDER, extract_text_from_image, preprocess_image
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif'}
+
+
+def load_samples(image_dir):
+    """ Returns a list of (image_bytes, ground_truth or None, name) tuples. """
+    samples = []
+    for name in sorted(os.listdir(image_dir)):
+        base, ext = os.path.splitext(name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        with open(os.path.join(image_dir, name), 'rb') as f:
+            image_bytes = f.read()
+        truth_path = os.path.join(image_dir, base + '.txt')
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, encoding='utf-8') as f:
+                truth = f.read()
+        samples.append((image_bytes, truth, name))
+    return samples
+
+
+def text_accuracy(extracted, truth):
+    """ Similarity in [0, 1] between OCR output and ground truth, ignoring whitespace layout. """
+    return difflib.SequenceMatcher(None, ' '.join(extracted.split()), ' '.join(truth.split())).ratio()
+
+
+def build_configs():
+    """ Raw image, the full pipeline, the full pipeline minus each stage, and each stage alone. """
+    configs = [("raw", ()), ("all", PREPROCESS_STAGE_ORDER)]
+    for stage in PREPROCESS_STAGE_ORDER:
+        configs.append((f"all - {stage}", tuple(s for s in PREPROCESS_STAGE_ORDER if s != stage)))
+    for stage in PREPROCESS_STAGE_ORDER:
+        configs.append((f"only {stage}", (stage,)))
+    return configs
+
+
+def run(samples, repeat):
+    print(f"{'config':<22}{'preprocess ms':>15}{'total ms':>12}{'accuracy':>10}")
+    for label, stages in build_configs():
+        preprocess_time = 0.0
+        total_time = 0.0
+        accuracies = []
+        for image_bytes, truth, _ in samples:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                preprocess_image(Image.open(io.BytesIO(image_bytes)), stages)
+                preprocess_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                text = extract_text_from_image(image_bytes, preprocess=stages)
+                total_time += time.perf_counter() - start
+            if truth is not None:
+                accuracies.append(text_accuracy(text, truth))
+
+        runs = len(samples) * repeat
+        accuracy = f"{sum(accuracies) / len(accuracies):.3f}" if accuracies else "n/a"
+        print(f"{label:<22}{preprocess_time / runs * 1000:>15.1f}{total_time / runs * 1000:>12.1f}{accuracy:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('image_dir', help="Directory of receipt images and .txt ground truth")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per image and configuration")
+    args = parser.parse_args()
+
+    samples = load_samples(args.image_dir)
+    if not samples:
+        print(f"No images found in {args.image_dir}")
+        return 1
+    print(f"Benchmarking {len(samples)} image(s), {args.repeat} run(s) each\n")
+    run(samples, args.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
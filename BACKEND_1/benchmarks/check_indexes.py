@@ -0,0 +1,170 @@
+# SmartSpendAnalyser/backend/benchmarks/check_indexes.py
+"""
+Checks, with explain plans, that the hot queries are answered from the indexes created by
+app.database.ensure_indexes rather than by collection scans or in-memory sorts.
+
+Needs a running MongoDB (MONGO_URI). All work happens in a scratch database,
+<DB_NAME>_index_check by default, which is dropped afterwards. Checked:
+  - Receipts by user_id, newest first, and the keyset-paginated transactions query (next
+    page after a (timestamp, _id) cursor): IXSCAN on user_id_timestamp_id, with no SORT stage
+  - a user's receipts from another parser or rules version (reparse.upgrade_user_receipts):
+    IXSCAN on user_id_parse_versions
+  - a user's receipts within a date window: IXSCAN on user_id_txn_date
+  - a user's spending rollups within a day window (app.analytics.daily_totals) and all of
+    them (app.analytics.category_totals): IXSCAN on user_id_day_category
+  - Users by username and by email: IXSCAN on username_unique / email_unique
+  - duplicate usernames and emails are rejected with DuplicateKeyError, reporting the key,
+    while several users without an email are still allowed; so is a second rollup row for
+    the same (user_id, day, category)
+
+Usage:
+    python benchmarks/check_indexes.py [--db NAME] [--receipts N] [--keep]
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
+
+from app.database import mongo_uri, db_name, ensure_indexes
+
+
+def plan_stages(plan):
+    """ Yields every stage dict in an explain plan tree, whatever the server version's layout. """
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+def winning_plan(cursor):
+    explain = cursor.explain()
+    planner = explain.get("queryPlanner", explain)
+    return planner["winningPlan"]
+
+
+def check_plan(label, cursor, index_name, allow_sort=True):
+    """ Returns a list of failure messages for one query. """
+    stages = list(plan_stages(winning_plan(cursor)))
+    names = [stage["stage"] for stage in stages]
+    used = {stage.get("indexName") for stage in stages if stage["stage"] == "IXSCAN"}
+    problems = []
+    if "COLLSCAN" in names:
+        problems.append(f"{label}: collection scan ({' <- '.join(names)})")
+    if index_name not in used:
+        problems.append(f"{label}: {index_name} not used (indexes used: {sorted(filter(None, used)) or 'none'})")
+    if not allow_sort and "SORT" in names:
+        problems.append(f"{label}: in-memory SORT stage ({' <- '.join(names)})")
+    print(f"{'ok  ' if not problems else 'FAIL'} {label}: {' <- '.join(names)}")
+    return problems
+
+
+def check_duplicate(label, collection, doc, expected_key):
+    """ Inserting doc must fail with a DuplicateKeyError whose keyPattern names expected_key. """
+    try:
+        collection.insert_one(doc)
+    except DuplicateKeyError as e:
+        key_pattern = (e.details or {}).get("keyPattern", {})
+        if expected_key in key_pattern:
+            print(f"ok   {label}: rejected on {key_pattern}")
+            return []
+        return [f"{label}: rejected, but on {key_pattern} instead of {expected_key}"]
+    return [f"{label}: duplicate was inserted"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=f"{db_name}_index_check", help="Scratch database (dropped afterwards)")
+    parser.add_argument('--receipts', type=int, default=5000, help="Receipts to insert, spread over 50 users")
+    parser.add_argument('--keep', action='store_true', help="Do not drop the scratch database")
+    args = parser.parse_args()
+
+    client = MongoClient(mongo_uri)
+    client.admin.command('ping')
+    db = client[args.db]
+    problems = []
+    try:
+        failed = ensure_indexes(db)
+        problems += [f"index {name} could not be created" for name in failed]
+        # A second run must be a no-op
+        problems += [f"index {name} failed on the second ensure_indexes" for name in ensure_indexes(db)]
+
+        rng = random.Random(3)
+        user_ids = [ObjectId() for _ in range(50)]
+        start = datetime.datetime(2024, 1, 1)
+        receipts = []
+        for _ in range(args.receipts):
+            timestamp = start + datetime.timedelta(minutes=rng.randrange(500000))
+            receipts.append({
+                "user_id": rng.choice(user_ids),
+                "extracted_text": "",
+                "parsed_data": {"total_amount": round(rng.uniform(1, 500), 2), "date": timestamp.date().isoformat()},
+                "timestamp": timestamp,
+                "txn_date": datetime.datetime.combine(timestamp.date(), datetime.time.min)
+            })
+        db.Receipts.insert_many(receipts)
+        db.Users.insert_many([{"username": f"user{i}", "email": f"user{i}@example.com"} for i in range(200)])
+        db.Users.insert_many([{"username": "no_email_a", "email": None}, {"username": "no_email_b", "email": None}])
+
+        problems += check_plan("receipts by user, newest first",
+                               db.Receipts.find({"user_id": user_ids[0]}).sort("timestamp", -1),
+                               "user_id_timestamp_id", allow_sort=False)
+        last = db.Receipts.find({"user_id": user_ids[0]}).sort([("timestamp", -1), ("_id", -1)]).limit(20)[19]
+        after_cursor = {"user_id": user_ids[0], "$or": [
+            {"timestamp": {"$lt": last["timestamp"]}},
+            {"timestamp": last["timestamp"], "_id": {"$lt": last["_id"]}}
+        ]}
+        problems += check_plan("transactions page after a cursor",
+                               db.Receipts.find(after_cursor).sort([("timestamp", -1), ("_id", -1)]).limit(21),
+                               "user_id_timestamp_id", allow_sort=False)
+        outdated = {"$or": [
+            {"user_id": user_ids[0], "parsed_data.parser_version": {"$ne": "2"}},
+            {"user_id": user_ids[0], "parsed_data.parser_version": "2", "parsed_data.rules_version": {"$ne": "1"}}
+        ]}
+        problems += check_plan("outdated receipts of a user", db.Receipts.find(outdated), "user_id_parse_versions")
+        window = {"user_id": user_ids[0], "txn_date": {"$gte": datetime.datetime(2024, 3, 1), "$lt": datetime.datetime(2024, 5, 1)},
+                  "parsed_data.total_amount": {"$exists": True}}
+        problems += check_plan("receipts of a user in a date window", db.Receipts.find(window), "user_id_txn_date")
+        db.SpendingRollups.insert_many([{
+            "user_id": user_id, "day": start + datetime.timedelta(days=day), "category": category,
+            "amount": 1.0, "count": 1, "bill_amount": 1.0, "bill_count": 1
+        } for user_id in user_ids for day in range(0, 360, 3) for category in ("Groceries", "Travel")])
+        day_window = {"user_id": user_ids[0], "day": {"$gte": datetime.datetime(2024, 3, 1), "$lt": datetime.datetime(2024, 5, 1)},
+                      "bill_count": {"$gt": 0}}
+        problems += check_plan("rollups of a user in a day window", db.SpendingRollups.find(day_window), "user_id_day_category")
+        problems += check_plan("all rollups of a user", db.SpendingRollups.find({"user_id": user_ids[0], "count": {"$gt": 0}}),
+                               "user_id_day_category")
+        problems += check_plan("user by username", db.Users.find({"username": "user7"}).limit(1), "username_unique")
+        problems += check_plan("user by email", db.Users.find({"email": "user7@example.com"}).limit(1), "email_unique")
+
+        problems += check_duplicate("duplicate username", db.Users,
+                                    {"username": "user7", "email": "other@example.com"}, "username")
+        problems += check_duplicate("duplicate email", db.Users,
+                                    {"username": "someone_else", "email": "user7@example.com"}, "email")
+        problems += check_duplicate("duplicate rollup row", db.SpendingRollups,
+                                    {"user_id": user_ids[0], "day": start, "category": "Groceries"}, "category")
+        print(f"ok   users without an email: {db.Users.count_documents({'email': None})} allowed")
+    finally:
+        if not args.keep:
+            client.drop_database(args.db)
+        client.close()
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
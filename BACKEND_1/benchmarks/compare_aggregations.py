@@ -0,0 +1,264 @@
+# SmartSpendAnalyser/backend/benchmarks/compare_aggregations.py
+"""
+Checks that app.analytics, reading the spending rollups, returns the same JSON as the Python
+loops that /api/charts/bar, /api/charts/pie and /api/summary used before, also when they
+come together from analytics.dashboard_data (/api/dashboard), and compares their latency
+as a user's history grows.
+
+The reference loops below are the former route bodies, reading every receipt of the user.
+The synthetic receipts are added to the rollups one by one with the same $inc upserts as
+db.insert_receipt_to_db, and app.rollups' check must then find nothing to fix. Amounts are
+compared with math.isclose, because the rollups add in a different order than Python's
+left-to-right float sums. Everything else, the order of the pie chart's categories included,
+must match exactly.
+
+Needs a running MongoDB (MONGO_URI). All work happens in a scratch database,
+<DB_NAME>_aggregation_check by default, which is dropped afterwards.
+
+Usage:
+    python benchmarks/compare_aggregations.py [--db NAME] [--sizes 10,1000,10000] [--seed N] [--keep]
+
+Exits with status 1 if any output differs.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+from app import analytics, database, rollups
+from app.database import mongo_uri, db_name, ensure_indexes
+from app.receipt_parser import PARSER_VERSION, transaction_date
+from app.categorizer import get_rules
+
+CATEGORIES = ["Food & Dining", "Groceries", "Travel", "Shopping", "Health", "Uncategorized", "Non-Spend Item"]
+
+
+# --- Reference implementations: the Python loops the routes used before ---
+
+def reference_bar(user_receipts, today):
+    daily_spending = {}
+    for i in range(7):
+        date_key = (today - timedelta(days=i)).isoformat()
+        daily_spending[date_key] = 0.0
+
+    for receipt in user_receipts:
+        if receipt.get('parsed_data') and 'date' in receipt['parsed_data'] and 'total_amount' in receipt['parsed_data']:
+            receipt_date_str = receipt['parsed_data']['date']
+            try:
+                if isinstance(receipt_date_str, datetime):
+                    receipt_date_str = receipt_date_str.isoformat().split('T')[0]
+
+                receipt_date = datetime.fromisoformat(receipt_date_str).date()
+                if receipt_date.isoformat() in daily_spending:
+                    daily_spending[receipt_date.isoformat()] += receipt['parsed_data']['total_amount']
+            except ValueError:
+                pass
+
+    labels = sorted(daily_spending.keys())
+    data_points = [daily_spending[label] for label in labels]
+    return {
+        'labels': labels,
+        'datasets': [{
+            'label': 'Spending per Day (Last 7 Days)',
+            'backgroundColor': 'rgba(211, 47, 47, 0.7)',
+            'borderColor': 'rgba(211, 47, 47, 1)',
+            'borderWidth': 1,
+            'hoverBackgroundColor': 'rgba(255, 102, 89, 0.8)',
+            'hoverBorderColor': 'rgba(255, 102, 89, 1)',
+            'data': data_points
+        }]
+    }
+
+
+def reference_pie(user_receipts):
+    category_spending = {}
+    for receipt in user_receipts:
+        if receipt.get('parsed_data') and 'items' in receipt['parsed_data'] and receipt['parsed_data']['items']:
+            for item in receipt['parsed_data']['items']:
+                category = item.get('category', 'Uncategorized')
+                amount = item.get('price', 0.0)
+                if amount > 0 and category != "Non-Spend Item":
+                    category_spending[category] = category_spending.get(category, 0.0) + amount
+        elif receipt.get('parsed_data') and 'category' in receipt['parsed_data'] and 'total_amount' in receipt['parsed_data']:
+            category = receipt['parsed_data']['category']
+            amount = receipt['parsed_data']['total_amount']
+            if amount > 0 and category != "Non-Spend Item":
+                category_spending[category] = category_spending.get(category, 0.0) + amount
+
+    labels = list(category_spending.keys())
+    data_points = list(category_spending.values())
+    colors = analytics.PIE_CHART_COLORS
+    return {
+        'labels': labels,
+        'datasets': [{
+            'data': data_points,
+            'backgroundColor': [colors[i % len(colors)] for i in range(len(labels))],
+            'hoverOffset': 4
+        }]
+    }
+
+
+def reference_summary(user_receipts, now):
+    current_month_spending = 0.0
+    last_month_spending = 0.0
+    daily_spending_sum = {}
+    current_month = now.month
+    current_year = now.year
+
+    for receipt in user_receipts:
+        if receipt.get('parsed_data') and 'total_amount' in receipt['parsed_data']:
+            amount = receipt['parsed_data']['total_amount']
+            receipt_date_str = receipt['parsed_data'].get('date')
+            if receipt_date_str:
+                try:
+                    if isinstance(receipt_date_str, datetime):
+                        receipt_date_str = receipt_date_str.isoformat().split('T')[0]
+
+                    receipt_date = datetime.fromisoformat(receipt_date_str).date()
+                    if receipt_date.month == current_month and receipt_date.year == current_year:
+                        current_month_spending += amount
+                        date_key = receipt_date.isoformat()
+                        daily_spending_sum[date_key] = daily_spending_sum.get(date_key, 0) + amount
+                    elif receipt_date.month == ((current_month - 1) if current_month > 1 else 12) and \
+                         receipt_date.year == (current_year if current_month > 1 else current_year - 1):
+                        last_month_spending += amount
+                except ValueError:
+                    pass
+
+    total_days_with_spending = len(daily_spending_sum)
+    average_daily = (sum(daily_spending_sum.values()) / total_days_with_spending) if total_days_with_spending > 0 else 0.0
+    return {
+        "currentMonthSpending": current_month_spending,
+        "lastMonthSpending": last_month_spending,
+        "averageDaily": average_daily,
+        "savingsRate": "N/A"
+    }
+
+
+# --- Synthetic history ---
+
+def make_receipt(user_id, rng, today, rules_version):
+    """ One receipt dated within ~75 days of today, with the shapes the loops must handle. """
+    day = today - timedelta(days=rng.randint(-3, 75))
+    date = day.isoformat()
+    if rng.random() < 0.05:
+        date += "T12:30:00" # A date with a time part
+    items = []
+    for _ in range(rng.choice([0, 0, 1, 2, 3, 5, 8])):
+        item = {"name": "item", "price": rng.choice([0.0, round(rng.uniform(0.5, 300), 2), rng.randint(1, 50)])}
+        if rng.random() < 0.95:
+            item["category"] = rng.choice(CATEGORIES)
+        items.append(item)
+    parsed_data = {
+        "total_amount": rng.choice([round(rng.uniform(1, 900), 2), rng.randint(1, 500)]),
+        "date": date,
+        "category": rng.choice(CATEGORIES),
+        "items": items,
+        "merchant": "Synthetic Store",
+        "parser_version": PARSER_VERSION,
+        "rules_version": rules_version
+    }
+    if rng.random() < 0.02:
+        parsed_data = {}
+    timestamp = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(3) * 60)
+    return {"user_id": user_id, "extracted_text": "", "parsed_data": parsed_data, "timestamp": timestamp,
+            "txn_date": transaction_date(parsed_data)}
+
+
+def differences(expected, actual, path="$"):
+    """ Lists where two JSON-like values differ; floats are compared with isclose. """
+    if isinstance(expected, float) or isinstance(actual, float):
+        if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) and \
+                math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9) and type(expected) is type(actual):
+            return []
+        return [f"{path}: {expected!r} != {actual!r}"]
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if list(expected) != list(actual):
+            return [f"{path}: keys {list(expected)} != {list(actual)}"]
+        return [d for key in expected for d in differences(expected[key], actual[key], f"{path}.{key}")]
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: {len(expected)} entries != {len(actual)}: {expected!r} vs {actual!r}"]
+        return [d for i, (e, a) in enumerate(zip(expected, actual)) for d in differences(e, a, f"{path}[{i}]")]
+    return [] if expected == actual and type(expected) is type(actual) else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def reference_dashboard(user_receipts, today, now):
+    """ /api/dashboard's summary and charts, the way the dashboard used to get them from three requests. """
+    return {"summary": reference_summary(user_receipts, now), "bar": reference_bar(user_receipts, today),
+            "pie": reference_pie(user_receipts)}
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=f"{db_name}_aggregation_check", help="Scratch database (dropped afterwards)")
+    parser.add_argument('--sizes', default="10,1000,10000", help="Receipts per synthetic user")
+    parser.add_argument('--seed', type=int, default=11, help="Seed for the synthetic receipts")
+    parser.add_argument('--keep', action='store_true', help="Do not drop the scratch database")
+    args = parser.parse_args()
+
+    client = MongoClient(mongo_uri)
+    client.admin.command('ping')
+    db = client[args.db]
+    ensure_indexes(db)
+    database.client, database.db, database.receipts_collection = client, db, db["Receipts"]
+    database.rollups_collection = db["SpendingRollups"]
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    today = now.date()
+    rules_version = get_rules().version
+    problems = []
+    print(f"{'receipts':>9} {'endpoint':>9} {'python ms':>10} {'rollups ms':>11}")
+    try:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            user_id = ObjectId()
+            receipts = [make_receipt(user_id, rng, today, rules_version) for _ in range(size)]
+            db.Receipts.insert_many(receipts)
+            for receipt in receipts:
+                rollups.write_updates(rollups.receipt_updates(None, receipt))
+            if rollups.check_rollups(user_id)["mismatched"]:
+                problems.append(f"{size} receipts: incremental rollups differ from a rebuild")
+
+            def load_all():
+                return list(db.Receipts.find({"user_id": user_id}).sort([("timestamp", -1), ("_id", -1)]))
+
+            checks = [
+                ("bar", lambda: reference_bar(load_all(), today), lambda: analytics.bar_chart_data(str(user_id), today)),
+                ("pie", lambda: reference_pie(load_all()), lambda: analytics.pie_chart_data(str(user_id))),
+                ("summary", lambda: reference_summary(load_all(), now), lambda: analytics.spending_summary(str(user_id), today)),
+                ("dashboard", lambda: reference_dashboard(load_all(), today, now),
+                 lambda: analytics.dashboard_data(str(user_id), ("summary", "bar", "pie"), today))
+            ]
+            for name, reference, from_rollups in checks:
+                actual, rollups_ms = timed(from_rollups)
+                expected, python_ms = timed(reference)
+                found = differences(expected, actual)
+                problems += [f"{size} receipts, {name}: {d}" for d in found[:10]]
+                print(f"{size:>9} {name:>9} {python_ms:>10.1f} {rollups_ms:>11.1f}{'  MISMATCH' if found else ''}")
+    finally:
+        if not args.keep:
+            client.drop_database(args.db)
+        client.close()
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
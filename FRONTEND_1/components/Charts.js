@@ -24,12 +24,19 @@ const chartOptions = {
     }
 };
 
-export function BarChart() {
-    const [chartData, setChartData] = useState(null);
-    const [loading, setLoading] = useState(true);
+// Pass `data` (e.g. from getDashboard) to skip fetching /api/charts/bar.
+export function BarChart({ data } = {}) {
+    const [chartData, setChartData] = useState(data ?? null);
+    const [loading, setLoading] = useState(data === undefined);
     const [error, setError] = useState(null);
 
     useEffect(() => {
+        if (data !== undefined) {
+            setChartData(data);
+            setLoading(false);
+            return;
+        }
+
         const fetchBarChartData = async () => {
             try {
                 // Using the imported 'api' instance
@@ -44,7 +51,7 @@ export function BarChart() {
         };
 
         fetchBarChartData();
-    }, []);
+    }, [data]);
 
     if (loading) {
         return <Typography>Loading bar chart...</Typography>;
@@ -67,12 +74,19 @@ export function BarChart() {
     );
 }
 
-export function PieChart() {
-    const [chartData, setChartData] = useState(null);
-    const [loading, setLoading] = useState(true);
+// Pass `data` (e.g. from getDashboard) to skip fetching /api/charts/pie.
+export function PieChart({ data } = {}) {
+    const [chartData, setChartData] = useState(data ?? null);
+    const [loading, setLoading] = useState(data === undefined);
     const [error, setError] = useState(null);
 
     useEffect(() => {
+        if (data !== undefined) {
+            setChartData(data);
+            setLoading(false);
+            return;
+        }
+
         const fetchPieChartData = async () => {
             try {
                 // Using the imported 'api' instance
@@ -87,7 +101,7 @@ export function PieChart() {
         };
 
         fetchPieChartData();
-    }, []);
+    }, [data]);
 
     if (loading) {
         return <Typography>Loading pie chart...</Typography>;
@@ -1,20 +1,35 @@
 import React, { useState, useEffect } from 'react';
-import { Table, TableBody, TableCell, TableHead, TableRow, Typography } from '@mui/material';
+import { Button, Table, TableBody, TableCell, TableHead, TableRow, Typography } from '@mui/material';
 
 // --- IMPORTANT: Adjust this path if your api.js is not in a 'utils' folder relative to this file ---
 import api from '../utils/api'; // <--- ADDED THIS IMPORT
 
-export default function ReactTransactions() {
-    const [transactions, setTransactions] = useState([]);
-    const [loading, setLoading] = useState(true);
+// Pass `initialPage` (e.g. the transactions from getDashboard) to skip fetching the first page.
+export default function ReactTransactions({ initialPage } = {}) {
+    const [transactions, setTransactions] = useState(initialPage?.transactions ?? []);
+    const [nextCursor, setNextCursor] = useState(initialPage?.next_cursor ?? null);
+    const [loading, setLoading] = useState(initialPage === undefined);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
 
+    // Fetches one page; the backend returns { transactions, next_cursor }
+    const fetchPage = async (cursor) => {
+        const response = await api.get('/api/transactions', { params: cursor ? { cursor } : {} });
+        setTransactions((previous) => (cursor ? [...previous, ...response.data.transactions] : response.data.transactions));
+        setNextCursor(response.data.next_cursor);
+    };
+
     useEffect(() => {
+        if (initialPage !== undefined) {
+            setTransactions(initialPage.transactions);
+            setNextCursor(initialPage.next_cursor);
+            setLoading(false);
+            return;
+        }
+
         const fetchTransactions = async () => {
             try {
-                // --- CHANGED THIS LINE: Using the imported 'api' instance ---
-                const response = await api.get('/api/transactions');
-                setTransactions(response.data); // Axios puts data in .data, no need for .json()
+                await fetchPage(null);
             } catch (err) {
                 console.error("Failed to fetch transactions:", err);
                 setError(err);
@@ -24,7 +39,19 @@ export default function ReactTransactions() {
         };
 
         fetchTransactions();
-    }, []);
+    }, [initialPage]);
+
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            await fetchPage(nextCursor);
+        } catch (err) {
+            console.error("Failed to fetch more transactions:", err);
+            setError(err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     if (loading) {
         return <Typography>Loading transactions...</Typography>;
@@ -68,6 +95,11 @@ export default function ReactTransactions() {
                     ))}
                 </TableBody>
             </Table>
+            {nextCursor && (
+                <Button onClick={loadMore} disabled={loadingMore} sx={{ mt: 1 }}>
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+            )}
         </>
     );
 }
\ No newline at end of file
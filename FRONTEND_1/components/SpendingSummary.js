@@ -4,7 +4,8 @@ import { Box, Typography } from '@mui/material';
 // --- IMPORTANT: Adjust this path if your api.js is not in a 'utils' folder relative to this file ---
 import api from '../utils/api'; // <--- ADDED THIS IMPORT
 
-export default function SpendingSummary() {
+// Pass `data` (e.g. the summary from getDashboard) to skip fetching /api/summary.
+export default function SpendingSummary({ data } = {}) {
     const [summary, setSummary] = useState({
         currentMonth: 'Loading...',
         lastMonth: 'Loading...',
@@ -12,23 +13,31 @@ export default function SpendingSummary() {
         savingsRate: 'Loading...',
         savingsRateColor: 'text.secondary'
     });
-    const [loading, setLoading] = useState(true);
+    const [loading, setLoading] = useState(data === undefined);
     const [error, setError] = useState(null);
 
+    const showSummary = (summaryData) => {
+        setSummary({
+            currentMonth: `$${summaryData.currentMonthSpending ? summaryData.currentMonthSpending.toFixed(2) : '0.00'}`,
+            lastMonth: `$${summaryData.lastMonthSpending ? summaryData.lastMonthSpending.toFixed(2) : '0.00'}`,
+            averageDaily: `$${summaryData.averageDaily ? summaryData.averageDaily.toFixed(2) : '0.00'}`,
+            savingsRate: `${summaryData.savingsRate ? summaryData.savingsRate : '0'}%`,
+            savingsRateColor: summaryData.savingsRate && summaryData.savingsRate > 0 ? 'primary' : 'text.secondary'
+        });
+    };
+
     useEffect(() => {
+        if (data !== undefined) {
+            showSummary(data);
+            setLoading(false);
+            return;
+        }
+
         const fetchSummary = async () => {
             try {
                 // --- CHANGED THIS LINE: Using the imported 'api' instance ---
                 const response = await api.get('/api/summary');
-                const data = response.data; // Axios puts data in .data, no need for .json()
-
-                setSummary({
-                    currentMonth: `$${data.currentMonthSpending ? data.currentMonthSpending.toFixed(2) : '0.00'}`,
-                    lastMonth: `$${data.lastMonthSpending ? data.lastMonthSpending.toFixed(2) : '0.00'}`,
-                    averageDaily: `$${data.averageDaily ? data.averageDaily.toFixed(2) : '0.00'}`,
-                    savingsRate: `${data.savingsRate ? data.savingsRate : '0'}%`,
-                    savingsRateColor: data.savingsRate && data.savingsRate > 0 ? 'primary' : 'text.secondary'
-                });
+                showSummary(response.data); // Axios puts data in .data, no need for .json()
             } catch (err) {
                 console.error("Failed to fetch summary:", err);
                 setError(err);
@@ -38,7 +47,7 @@ export default function SpendingSummary() {
         };
 
         fetchSummary();
-    }, []);
+    }, [data]);
 
     if (loading) {
         return <Typography>Loading summary...</Typography>;
@@ -2,7 +2,7 @@ import { useEffect, useState } from 'react';
 import { useRouter } from 'next/router';
 import { useAuth } from '../context/AuthContext';
 import { Typography, Box, CircularProgress, Paper, Grid, Card, CardContent, Alert } from '@mui/material';
-import { getSpendingSummary, getTransactions } from '../utils/api';
+import { getDashboard } from '../utils/api';
 import { BarChart, PieChart } from '../components/Charts';
 import {
   Chart as ChartJS,
@@ -42,6 +42,8 @@ export default function Home() {
   const router = useRouter();
   const [summary, setSummary] = useState(null);
   const [transactions, setTransactions] = useState([]);
+  const [barData, setBarData] = useState(null);
+  const [pieData, setPieData] = useState(null);
   const [dataLoading, setDataLoading] = useState(true);
   const [dataError, setDataError] = useState('');
   const [isClient, setIsClient] = useState(false);
@@ -58,12 +60,12 @@ export default function Home() {
         setDataLoading(true);
         setDataError('');
         try {
-          const [summaryRes, transactionsRes] = await Promise.all([
-            getSpendingSummary(),
-            getTransactions(),
-          ]);
-          setSummary(summaryRes);
-          setTransactions(transactionsRes);
+          // One request for the summary, both charts and the transactions
+          const dashboard = await getDashboard({ limit: 5 }); // Only the five most recent are shown
+          setSummary(dashboard.summary);
+          setBarData(dashboard.bar);
+          setPieData(dashboard.pie);
+          setTransactions(dashboard.transactions.transactions);
         } catch (err) {
           console.error('Failed to fetch dashboard data:', err);
           setDataError('Failed to load dashboard data. Please try again.');
@@ -141,7 +143,7 @@ export default function Home() {
             <Typography variant="h6" gutterBottom align="center">
               Daily Spending Trends
             </Typography>
-            {isClient && <BarChart />}
+            {isClient && <BarChart data={barData} />}
           </Paper>
         </Grid>
 
@@ -151,7 +153,7 @@ export default function Home() {
             <Typography variant="h6" gutterBottom align="center">
               Spending Categories
             </Typography>
-            {isClient && <PieChart />}
+            {isClient && <PieChart data={pieData} />}
           </Paper>
         </Grid>
 
@@ -4,9 +4,20 @@ import { useRouter } from 'next/router';
 import { useAuth } from '../context/AuthContext'; // Corrected typo: AuthContext
 import { Button, Paper, Typography, Box, CircularProgress, Alert, Container } from '@mui/material'; // Added Container import
 import { CloudUpload } from '@mui/icons-material';
-import { uploadReceipt } from '../utils/api';
+import { uploadReceiptAsync, streamJobEvents } from '../utils/api';
 import { motion } from 'framer-motion';
 
+// Labels for the processing stages streamed by /api/jobs/<id>/events
+const STAGE_LABELS = {
+    received: 'Receipt received',
+    started: 'Processing started',
+    preprocessed: 'Image prepared',
+    ocr_done: 'Text extracted',
+    parsed: 'Receipt parsed',
+    stored: 'Receipt saved',
+    failed: 'Processing failed',
+};
+
 export default function Upload() {
     const { user, loading } = useAuth();
     const router = useRouter();
@@ -15,6 +26,7 @@ export default function Upload() {
     const [uploadSuccess, setUploadSuccess] = useState(false);
     const [uploadError, setUploadError] = useState('');
     const [file, setFile] = useState(null);
+    const [stages, setStages] = useState([]);
 
     useEffect(() => {
         if (!loading && (!user || !user.isLoggedIn)) {
@@ -42,15 +54,23 @@ export default function Upload() {
         }
 
         setIsUploading(true);
+        setStages([]);
 
         try {
-            await uploadReceipt(file); // userId is used on frontend for clarity, backend uses JWT identity
+            // userId is used on frontend for clarity, backend uses JWT identity
+            const upload = await uploadReceiptAsync(file);
+            if (upload.job_id) { // Cached receipts come back already processed, without a job
+                const job = await streamJobEvents(upload.job_id, (stage) => setStages((prev) => [...prev, stage]));
+                if (job.status !== 'done') {
+                    throw new Error(job.error || 'Processing failed.');
+                }
+            }
             setUploadSuccess(true);
             setFile(null);
             setTimeout(() => setUploadSuccess(false), 3000);
         } catch (error) {
             console.error('Upload failed:', error.response?.data || error.message);
-            setUploadError(error.response?.data?.error || 'Upload failed. Please try again.');
+            setUploadError(error.response?.data?.error || error.message || 'Upload failed. Please try again.');
         } finally {
             setIsUploading(false);
         }
@@ -125,9 +145,18 @@ export default function Upload() {
                         )}
 
                         {isUploading ? (
-                            <Box sx={{ display: 'flex', alignItems: 'center', mt: 2 }}>
-                                <CircularProgress size={24} sx={{ mr: 2, color: 'primary.light' }} />
-                                <Typography sx={{ color: 'text.primary' }}>Processing receipt...</Typography>
+                            <Box sx={{ mt: 2, display: 'flex', flexDirection: 'column', alignItems: 'center' }}>
+                                <Box sx={{ display: 'flex', alignItems: 'center' }}>
+                                    <CircularProgress size={24} sx={{ mr: 2, color: 'primary.light' }} />
+                                    <Typography sx={{ color: 'text.primary' }}>
+                                        {stages.length > 0 ? STAGE_LABELS[stages[stages.length - 1].stage] || 'Processing receipt...' : 'Uploading receipt...'}
+                                    </Typography>
+                                </Box>
+                                {stages.map((stage) => (
+                                    <Typography key={stage.stage} variant="caption" sx={{ color: '#B0BEC5' }}>
+                                        {STAGE_LABELS[stage.stage] || stage.stage} ({stage.stage_ms} ms)
+                                    </Typography>
+                                ))}
                             </Box>
                         ) : (
                             <Button
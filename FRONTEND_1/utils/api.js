@@ -125,6 +125,70 @@ export const uploadReceipt = async (file) => {
     }
 };
 
+// Queues the receipt for background OCR and returns { job_id, events_url, ... } right away.
+export const uploadReceiptAsync = async (file) => {
+    const formData = new FormData();
+    formData.append('image', file);
+
+    try {
+        const response = await api.post('/api/upload?async=1', formData, {
+            headers: {
+                'Content-Type': undefined,
+            },
+        });
+        return response.data;
+    } catch (error) {
+        console.error('Upload API Error:', error.response?.data || error.message);
+        throw error;
+    }
+};
+
+// Follows the Server-Sent Events stream of an upload job. Calls onStage for every
+// processing stage and resolves with the final job (status, result, stage timings).
+// Uses fetch instead of EventSource so the JWT can be sent in the Authorization header.
+export const streamJobEvents = async (jobId, onStage) => {
+    const token = localStorage.getItem('access_token');
+    const response = await fetch(`${API_BASE_URL}/api/jobs/${jobId}/events`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+        credentials: 'include',
+    });
+    if (!response.ok) {
+        throw new Error(`Job events request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            throw new Error('Job event stream ended before the job finished.');
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventType = 'message';
+            let data = '';
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event:')) eventType = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            if (!data) continue; // keepalive comment
+
+            const payload = JSON.parse(data);
+            if (eventType === 'result') {
+                reader.cancel();
+                return payload;
+            }
+            if (onStage) onStage(payload);
+        }
+    }
+};
+
 export const getUserData = async (userId) => {
     try {
         const response = await api.get(`/api/profile/${userId}`); // Correct usage
@@ -135,9 +199,11 @@ export const getUserData = async (userId) => {
     }
 };
 
-export const getTransactions = async () => {
+// Returns one page: { transactions, next_cursor }. Pass next_cursor back as `cursor` for the
+// next page. Optional params: limit, cursor, category, merchant, date_from, date_to, include_raw.
+export const getTransactions = async (params = {}) => {
     try {
-        const response = await api.get('/api/transactions'); // Correct usage
+        const response = await api.get('/api/transactions', { params });
         return response.data;
     } catch (error) {
         console.error('Get Transactions API Error:', error.response?.data || error.message);
@@ -145,6 +211,19 @@ export const getTransactions = async () => {
     }
 };
 
+// Summary, charts and the first page of transactions in one request:
+// { summary, bar, pie, transactions: { transactions, next_cursor } }. Optional params:
+// sections (comma-separated subset of 'summary,bar,pie,transactions') and limit.
+export const getDashboard = async (params = {}) => {
+    try {
+        const response = await api.get('/api/dashboard', { params });
+        return response.data;
+    } catch (error) {
+        console.error('Get Dashboard API Error:', error.response?.data || error.message);
+        throw error;
+    }
+};
+
 export const getChartData = async (chartType) => {
     try {
         const response = await api.get(`/api/charts/${chartType}`); // Correct usage